@@ -10,6 +10,7 @@ except ImportError as exc:  # noqa: PERF203
 from paper_search.paper_view import setup_paper_view
 from paper_search.experiment_view import setup_experiment_view
 import utils.resource_manager as R
+from utils.ui import require_resources
 
 
 # ---- Mock Data & Functions ----
@@ -35,7 +36,13 @@ if _search_import_error is not None:
         "the issue is resolved.\n"
         f"ImportError: {_search_import_error}"
     )
-elif st.session_state.selected_resource is None:
+    st.stop()
+
+# Resources hydrate in a background thread; the views below need the repository.
+if not require_resources():
+    st.stop()
+
+if st.session_state.selected_resource is None:
     setup_search_page(on_resource_clicked)
 else:
     # ---- Paper Details View ----
@@ -1,16 +1,13 @@
-import time
 import matplotlib.pyplot as plt
 import networkx as nx
 from pandas import read_csv
 from pyalex import Works
 
 from utils.config import PUBLICATIONS_PATH
+from utils.request_scheduler import OPENALEX_HOST, SCHEDULER
 
 
 BATCH_SIZE = 50
-REQUEST_DELAY = 0.5
-MAX_RETRY = 3
-BACKOFF_FACTOR = 2.0
 SPRING_LAYOUT_K = 0.35
 
 
@@ -19,7 +16,9 @@ def fetch_root_work(title):
         print("The first publication title is missing or invalid.")
         return None
     try:
-        search_results = Works().search_filter(title=title).get()
+        search_results = SCHEDULER.call(
+            OPENALEX_HOST, lambda: Works().search_filter(title=title).get()
+        )
     except Exception as exc:
         print(f"Failed to fetch OpenAlex record for '{title}': {exc}")
         return None
@@ -41,22 +40,11 @@ def fetch_reference_details(reference_ids):
         return details
 
     for chunk in _chunked(cleaned_ids, BATCH_SIZE):
-        attempt = 0
-        delay = REQUEST_DELAY
-        works = []
-        while attempt < MAX_RETRY:
-            try:
-                works = Works()[chunk]
-                break
-            except Exception as exc:
-                attempt += 1
-                if attempt >= MAX_RETRY:
-                    print(f"Skipping chunk of {len(chunk)} references: {exc}")
-                    works = []
-                    break
-                print(f"Retrying chunk fetch due to error: {exc}")
-                time.sleep(delay)
-                delay *= BACKOFF_FACTOR
+        try:
+            works = SCHEDULER.call(OPENALEX_HOST, lambda: Works()[chunk])
+        except Exception as exc:
+            print(f"Skipping chunk of {len(chunk)} references: {exc}")
+            works = []
         for work in works:
             openalex_id = work.get("id")
             if not openalex_id:
@@ -67,7 +55,6 @@ def fetch_reference_details(reference_ids):
                 "label": label,
                 "references": references,
             }
-        time.sleep(REQUEST_DELAY)
     return details
 
 
@@ -0,0 +1,60 @@
+"""Measure what ``__slots__`` saves on the resources the app actually loads.
+
+Resources come from the publication CSV and, when present, the OSDR export.
+Each one is copied twice, into its slotted class and into a plain ``__dict__``
+object with the same attributes (``type``/``icon`` included, as they were per
+instance before). Both copies share the attribute values, so the difference is
+the per-object overhead alone.
+"""
+
+import tracemalloc
+
+import utils.resource_manager as R
+from utils.config import EXPERIMENTS_PATH
+
+
+class DictResource:
+    pass
+
+
+def slotted_copy(resource):
+    copy = object.__new__(type(resource))
+    for name in type(resource).__slots__:
+        if hasattr(resource, name):
+            setattr(copy, name, getattr(resource, name))
+    return copy
+
+
+def dict_copy(resource):
+    copy = DictResource()
+    for name in type(resource).__slots__:
+        if hasattr(resource, name):
+            setattr(copy, name, getattr(resource, name))
+    copy.type = resource.type
+    copy.icon = resource.icon
+    return copy
+
+
+def measure(resources, make_copy):
+    tracemalloc.start()
+    copies = [make_copy(resource) for resource in resources]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    return current
+
+
+if __name__ == "__main__":
+    R._load_publications()
+    if EXPERIMENTS_PATH.exists():
+        R._load_experiments()
+    else:
+        print(f"{EXPERIMENTS_PATH} not found; measuring publications only.")
+    resources = list(R.RESOURCES.values())
+
+    dict_bytes = measure(resources, dict_copy)
+    slotted_bytes = measure(resources, slotted_copy)
+    print(f"{len(resources)} resources")
+    print(f"dict layout:    {dict_bytes / 2**10:8.1f} KiB")
+    print(f"slotted layout: {slotted_bytes / 2**10:8.1f} KiB")
+    print(f"saved:          {(1 - slotted_bytes / dict_bytes) * 100:8.1f} %")
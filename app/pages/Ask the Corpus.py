@@ -0,0 +1,146 @@
+from typing import Any, Dict, List
+
+import streamlit as st
+
+import utils.paper_chat as paper_chat
+import utils.resource_manager as R
+from utils.ui import require_resources
+
+# ------------------------------------------------------------
+# 🎨 Page Configuration
+# ------------------------------------------------------------
+st.set_page_config(page_title="Ask the Corpus", page_icon="💬", layout="wide")
+
+st.title("💬 Ask the Corpus")
+st.markdown("#### Ask questions across every indexed paper and get answers with citations.")
+
+passage_index = paper_chat.get_passage_index()
+if passage_index is None:
+    st.info(
+        "The corpus passage index has not been built yet. "
+        "Run `python scripts/build_artifacts.py` to extract and index the PDFs."
+    )
+    st.stop()
+
+client = paper_chat.get_openai_client()
+if client is None:
+    st.error("OpenAI API key missing. Add `OPENAI_API_KEY` to Streamlit secrets to enable Q&A.")
+    st.stop()
+
+st.caption(
+    f"{passage_index.passage_count:,} passages from {passage_index.paper_count:,} papers."
+)
+
+# Paper titles for the scope picker and citations come from the resource repository.
+if not require_resources():
+    st.stop()
+
+# ------------------------------------------------------------
+# 🔎 Scope
+# ------------------------------------------------------------
+scope_options: List[Any] = [None] + [
+    int(resource_id)
+    for resource_id in passage_index.resource_ids
+    if int(resource_id) in R.RESOURCES
+]
+scope = st.selectbox(
+    "Search in",
+    scope_options,
+    format_func=lambda resource_id: (
+        "All papers" if resource_id is None else R.RESOURCES[resource_id].title
+    ),
+)
+
+SYSTEM_PROMPT = (
+    "You are BioScholar, an assistant for NASA space biology research. Answer using only "
+    "the numbered sources provided with each question. Cite every claim with the source "
+    "number in square brackets, e.g. [2]. If the sources do not answer the question, say so."
+)
+
+
+def cite_sources(passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Number the papers behind ``passages``; passages from one paper share a number."""
+    sources: Dict[int, Dict[str, Any]] = {}
+    for passage in passages:
+        resource_id = passage["resource_id"]
+        source = sources.get(resource_id)
+        if source is None:
+            resource = R.RESOURCES.get(resource_id)
+            source = sources[resource_id] = {
+                "number": len(sources) + 1,
+                "resource_id": resource_id,
+                "title": resource.title if resource is not None else f"Resource {resource_id}",
+                "passages": [],
+            }
+        source["passages"].append(passage["text"])
+    return list(sources.values())
+
+
+def format_sources(sources: List[Dict[str, Any]]) -> str:
+    blocks = []
+    for source in sources:
+        excerpts = "\n".join(f"- {text}" for text in source["passages"])
+        blocks.append(f"[{source['number']}] {source['title']}\n{excerpts}")
+    return "\n\n".join(blocks)
+
+
+def open_resource(resource_id: int) -> None:
+    st.session_state.selected_resource = resource_id
+
+
+def render_sources(sources: List[Dict[str, Any]], *, key: str) -> None:
+    if not sources:
+        return
+    with st.expander("Sources", expanded=False):
+        for source in sources:
+            title_col, button_col = st.columns([5, 1])
+            title_col.markdown(f"**[{source['number']}]** {source['title']}")
+            if button_col.button(
+                "Open",
+                key=f"{key}_{source['number']}",
+                on_click=open_resource,
+                args=(source["resource_id"],),
+            ):
+                st.switch_page("BioScholar.py")
+
+
+# ------------------------------------------------------------
+# 💬 Chat
+# ------------------------------------------------------------
+history: List[Dict[str, Any]] = st.session_state.setdefault("corpus_chat_history", [])
+
+for turn, message in enumerate(history):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        render_sources(message.get("sources", []), key=f"corpus_source_{turn}")
+
+prompt = st.chat_input("Ask a question across the corpus...")
+if prompt:
+    with st.chat_message("user"):
+        st.markdown(prompt)
+
+    with st.spinner("Searching the corpus..."):
+        passages = paper_chat.retrieve_corpus_passages(
+            prompt, passage_index, client, resource_id=scope
+        )
+    sources = cite_sources(passages)
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages += [{"role": entry["role"], "content": entry["content"]} for entry in history]
+    messages.append(
+        {
+            "role": "user",
+            "content": (
+                f"Sources:\n{format_sources(sources) or 'No relevant passages found.'}\n\n"
+                f"Question: {prompt}"
+            ),
+        }
+    )
+
+    with st.chat_message("assistant"):
+        response = st.write_stream(paper_chat.stream_chat_response(messages))
+        render_sources(sources, key=f"corpus_source_{len(history) + 1}")
+
+    history.append({"role": "user", "content": prompt})
+    if response:
+        history.append({"role": "assistant", "content": response, "sources": sources})
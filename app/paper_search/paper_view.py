@@ -1,4 +1,5 @@
 import html
+import time
 from typing import Any, Dict, List, Optional
 
 import matplotlib.pyplot as plt
@@ -11,6 +12,50 @@ import utils.resource_manager as R
 from utils.similarity_graph import get_similarity_graph
 
 
+# Streamed replies are redrawn at most this often (about 20 frames per second).
+STREAM_FRAME_SECONDS = 0.05
+
+CHAT_STYLE = """
+<style>
+.paper-chat-message {
+    display: flex;
+    gap: 0.75rem;
+    align-items: flex-start;
+}
+.paper-chat-message.paper-chat-user {
+    flex-direction: row-reverse;
+}
+.paper-chat-avatar {
+    width: 32px;
+    height: 32px;
+    border-radius: 50%;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    background: rgba(15, 87, 178, 0.15);
+    font-size: 0.9rem;
+    flex-shrink: 0;
+}
+.paper-chat-user .paper-chat-avatar {
+    background: rgba(52, 199, 89, 0.2);
+}
+.paper-chat-bubble {
+    padding: 0.75rem 1rem;
+    border-radius: 0.9rem;
+    background: #ffffff;
+    border: 1px solid rgba(15, 87, 178, 0.12);
+    box-shadow: 0 4px 10px rgba(15, 87, 178, 0.05);
+    max-width: 100%;
+    word-break: break-word;
+}
+.paper-chat-user .paper-chat-bubble {
+    background: rgba(52, 199, 89, 0.12);
+    border-color: rgba(52, 199, 89, 0.25);
+}
+</style>
+"""
+
+
 def setup_paper_view(resource_id: int, resource: R.PaperResource):
 
     st.header(f"📘 {resource.title}")
@@ -62,20 +107,17 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
             else:
                 st.info("No abstract available for this work.")
 
-    pdf_bytes_key = f"paper_pdf_bytes_{resource_id}"
-
     with read_tab:
         st.subheader("Read the Paper")
-        pdf_bytes: Optional[bytes] = st.session_state.get(pdf_bytes_key)
-
-        if pdf_bytes is None and pdf_url:
+        pdf_path = None
+        if pdf_url:
+            # The PDF cache is on disk and shared, so nothing is kept per session here.
             with st.spinner("Loading PDF viewer..."):
-                pdf_bytes = paper_chat.fetch_pdf_bytes(pdf_url)
-            st.session_state[pdf_bytes_key] = pdf_bytes
+                pdf_path = paper_chat.fetch_pdf_path(pdf_url)
 
-        if pdf_bytes:
+        if pdf_path is not None:
             try:
-                st.pdf(pdf_bytes, height=850)
+                st.pdf(pdf_path, height=850)
             except Exception:
                 st.warning(
                     "Inline PDF viewer unavailable. Use the links below instead."
@@ -196,10 +238,10 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
             st.write("No experiments on this publication available")
 
     with references_tab:
-        referenced_work = resource.referenced_work
-        if referenced_work is not None:
-            for ref in resource.referenced_work:
-                st.markdown(ref)
+        # References render as each OpenAlex batch arrives instead of after the last one.
+        references_placeholder = st.empty()
+        for referenced_work in resource.iter_referenced_work():
+            references_placeholder.markdown("\n".join(referenced_work))
 
     with qa_tab:
         st.markdown("#### Research Q&A")
@@ -243,6 +285,7 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
             passages: List[Dict[str, Any]],
             *,
             truncated: bool,
+            failed: bool,
         ) -> None:
             with support_placeholder.container():
                 with st.expander("Recent supporting passages", expanded=False):
@@ -259,16 +302,24 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
                         st.info(
                             "No supporting passages yet. Ask a question to fetch relevant snippets."
                         )
-                if truncated:
-                    approx_chars = paper_chat.approx_indexed_character_count()
+                    cache_summary = paper_chat.answer_cache_summary()
+                    if cache_summary:
+                        st.caption(cache_summary)
+                if failed:
                     st.caption(
-                        "Indexed approximately the first "
-                        f"{approx_chars:,} characters of the PDF for retrieval to keep queries responsive."
+                        "Part of the PDF could not be indexed; answers draw on the passages "
+                        "indexed so far. Ask another question to retry the rest."
+                    )
+                elif truncated:
+                    st.caption(
+                        "The rest of the PDF is still being indexed; answers so far draw on "
+                        "the passages indexed first."
                     )
 
         render_supporting_passages(
             retrieval_results,
             truncated=bool(pdf_index and pdf_index.get("truncated")),
+            failed=bool(pdf_index and pdf_index.get("failed")),
         )
 
         chat_state_key = f"paper_chat_history_{resource_id}"
@@ -282,7 +333,10 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
             chat_state_key, [intro_message]
         )
 
-        chat_placeholder = st.empty()
+        st.markdown(CHAT_STYLE, unsafe_allow_html=True)
+        # Each message is its own element: past messages are sent once and only the
+        # bubble being streamed is updated.
+        chat_box = st.container(height=520)
 
         def _format_message(entry: Dict[str, str]) -> str:
             role = entry.get("role", "assistant")
@@ -297,90 +351,37 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
                 "</div>"
             )
 
-        def render_history(
-            messages: List[Dict[str, str]],
-            *,
-            stream_generator=None,
-        ) -> Optional[str]:
-            style_block = """
-            <style>
-            .paper-chat-scroll {
-                height: 520px;
-                max-height: 520px;
-                overflow-y: auto;
-                padding: 0.25rem 0.5rem 0.75rem;
-                border-radius: 0.75rem;
-                border: 1px solid rgba(15, 87, 178, 0.15);
-                background: rgba(248, 250, 255, 0.6);
-                display: flex;
-                flex-direction: column;
-                gap: 0.75rem;
-                box-sizing: border-box;
-            }
-            .paper-chat-message {
-                display: flex;
-                gap: 0.75rem;
-                align-items: flex-start;
-                flex-shrink: 0;
-            }
-            .paper-chat-message.paper-chat-user {
-                flex-direction: row-reverse;
-            }
-            .paper-chat-avatar {
-                width: 32px;
-                height: 32px;
-                border-radius: 50%;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                background: rgba(15, 87, 178, 0.15);
-                font-size: 0.9rem;
-            }
-            .paper-chat-user .paper-chat-avatar {
-                background: rgba(52, 199, 89, 0.2);
-            }
-            .paper-chat-bubble {
-                padding: 0.75rem 1rem;
-                border-radius: 0.9rem;
-                background: #ffffff;
-                border: 1px solid rgba(15, 87, 178, 0.12);
-                box-shadow: 0 4px 10px rgba(15, 87, 178, 0.05);
-                max-width: 100%;
-                word-break: break-word;
-            }
-            .paper-chat-user .paper-chat-bubble {
-                background: rgba(52, 199, 89, 0.12);
-                border-color: rgba(52, 199, 89, 0.25);
-            }
-            </style>
-            """
-
-            def compose(active_text: Optional[str] = None) -> str:
-                body = "".join(_format_message(entry) for entry in messages)
-                if active_text:
-                    body += _format_message(
-                        {"role": "assistant", "content": active_text}
-                    )
-                return style_block + f"<div class='paper-chat-scroll'>{body}</div>"
-
-            chat_placeholder.markdown(compose(), unsafe_allow_html=True)
-
-            if stream_generator is None:
-                return None
+        def append_message(entry: Dict[str, str]) -> None:
+            chat_box.markdown(_format_message(entry), unsafe_allow_html=True)
 
+        def stream_reply(stream_generator) -> Optional[str]:
+            bubble = chat_box.empty()
             response_text = ""
+            last_frame = 0.0
             for chunk in stream_generator or []:
                 if not chunk:
                     continue
                 response_text += chunk
-                chat_placeholder.markdown(
-                    compose(response_text),
-                    unsafe_allow_html=True,
-                )
+                now = time.monotonic()
+                # Coalesce tokens so the bubble is redrawn at most once per frame.
+                if now - last_frame >= STREAM_FRAME_SECONDS:
+                    bubble.markdown(
+                        _format_message({"role": "assistant", "content": response_text}),
+                        unsafe_allow_html=True,
+                    )
+                    last_frame = now
 
-            return response_text or None
+            if not response_text:
+                bubble.empty()
+                return None
+            bubble.markdown(
+                _format_message({"role": "assistant", "content": response_text}),
+                unsafe_allow_html=True,
+            )
+            return response_text
 
-        render_history(chat_history)
+        for entry in chat_history:
+            append_message(entry)
 
         base_messages: List[Dict[str, str]] = [
             {
@@ -404,22 +405,36 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
         user_prompt = st.chat_input("Ask a question about this paper...")
 
         if user_prompt:
+            # Only opening questions are cached; follow-ups depend on the conversation.
+            standalone = not any(entry.get("role") == "user" for entry in chat_history)
             user_message = {"role": "user", "content": user_prompt}
             chat_history.append(user_message)
+            append_message(user_message)
 
             context_messages = list(base_messages)
 
             retrieval_passages: List[Dict[str, Any]] = []
+            cached_answer = None
+            pdf_index_local = None
             client = paper_chat.get_openai_client()
             if client:
                 pdf_index_local = pdf_index
-                if pdf_index_local is None and pdf_text and pdf_url:
+                # A truncated index is still filling in (or failed and is retried);
+                # pick up the batches embedded since.
+                needs_index = pdf_index_local is None or pdf_index_local.get("truncated")
+                if needs_index and pdf_text and pdf_url:
                     with st.spinner("Indexing PDF for semantic search..."):
                         pdf_index_local = paper_chat.build_pdf_index(pdf_text, client)
                     st.session_state[pdf_index_key] = pdf_index_local
                     pdf_index = pdf_index_local
 
-                if pdf_index_local:
+                if pdf_index_local and standalone:
+                    cached_answer = paper_chat.lookup_cached_answer(
+                        resource_id, user_prompt, pdf_index_local, client
+                    )
+                if cached_answer is not None:
+                    retrieval_passages = cached_answer.passages
+                elif pdf_index_local:
                     retrieval_passages = paper_chat.retrieve_passages(
                         user_prompt, pdf_index_local, client
                     )
@@ -428,6 +443,7 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
             render_supporting_passages(
                 retrieval_passages,
                 truncated=bool(pdf_index and pdf_index.get("truncated")),
+                failed=bool(pdf_index and pdf_index.get("failed")),
             )
 
             if retrieval_passages:
@@ -459,11 +475,25 @@ def setup_paper_view(resource_id: int, resource: R.PaperResource):
 
             messages_payload = context_messages + chat_history
 
-            response_text = render_history(
-                chat_history,
-                stream_generator=paper_chat.stream_chat_response(messages_payload),
-            )
-
+            if cached_answer is not None:
+                stream_generator = paper_chat.replay_answer(cached_answer.answer)
+            else:
+                stream_generator = paper_chat.stream_chat_response(messages_payload)
+            response_text = stream_reply(stream_generator)
+
+            if response_text and cached_answer is None and standalone and pdf_index_local:
+                paper_chat.remember_answer(
+                    resource_id,
+                    user_prompt,
+                    pdf_index_local,
+                    client,
+                    response_text,
+                    retrieval_passages,
+                )
+            if cached_answer is not None:
+                st.caption(
+                    "Answered from a recent reply to a similar question "
+                    f"(similarity {cached_answer.similarity:.2f})."
+                )
             if response_text:
                 chat_history.append({"role": "assistant", "content": response_text})
-                render_history(chat_history)
@@ -1,6 +1,7 @@
 import streamlit as st
 
 from utils.resource_manager import (
+    ann_search_summary,
     sample_resources,
     search_resources,
 )
@@ -79,3 +80,7 @@ def setup_search_page(on_resource_clicked):
             on_click=lambda rid=resource_id: on_resource_clicked(rid),
         )
         st.divider()
+
+    ann_summary = ann_search_summary()
+    if ann_summary:
+        st.caption(ann_summary)
@@ -1,19 +1,56 @@
-"""Command-line helper to build resource and similarity graph artifacts."""
+"""Command-line helper to build resource, search index and similarity graph artifacts."""
 
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from pandas import read_csv
 
 # Ensure project root on sys.path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from utils.config import RESOURCE_PATH, SIM_GRAPH  # noqa: E402
+from utils.ann_index import DEFAULT_NPROBE, IVFIndex, recall_at_k  # noqa: E402
+from utils.config import (  # noqa: E402
+    ANN_INDEX_PATH,
+    LEXICAL_INDEX_PATH,
+    LINK_INDEX_PATH,
+    PASSAGE_INDEX_DIR,
+    PUBLICATIONS_PATH,
+    SIM_GRAPH,
+    SNAPSHOT_DIR,
+)
+from utils import resource_manager  # noqa: E402
+from utils.openalex_utils import prefetch_works  # noqa: E402
+from utils.chunk_index import CHUNK_INDEX, chunk_index_key  # noqa: E402
+from utils.paper_chat import (  # noqa: E402
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    EMBED_MODEL as CHUNK_EMBED_MODEL,
+    PDF_TEXT_MAX_BYTES,
+    PdfTooLargeError,
+    download_pdf,
+    start_pdf_index,
+)
+from utils.passage_index import PassageIndex  # noqa: E402
+from utils.pdf_cache import PdfCache  # noqa: E402
+from utils.pdf_text_store import PDF_TEXT_STORE, extract_pdf_text  # noqa: E402
+from utils.request_scheduler import SCHEDULER  # noqa: E402
 from utils.resource_manager import (  # noqa: E402
-    RESOURCES,
+    PaperResource,
+    _get_openai_client,
     _load_resources,
+    build_lexical_index,
+    build_link_index,
+    embedding_refresh_report,
     save_repository_snapshot,
 )
 from utils.similarity_graph import (  # noqa: E402
@@ -22,13 +59,295 @@ from utils.similarity_graph import (  # noqa: E402
 )
 
 
-def build_resources(verbose: bool = True) -> None:
+def report_embedding_refresh(refresh_sources: bool = False) -> None:
+    _load_resources(refresh_sources=refresh_sources, embed=False)
+    report = embedding_refresh_report()
+    print(
+        "Embedding refresh plan: "
+        f"{report['new']} new, {report['changed']} changed, "
+        f"{report['model_changed']} on an old model, {report['unchanged']} unchanged, "
+        f"{report['empty']} without text."
+    )
+    if report["backfilled"]:
+        print(f"  {report['backfilled']} stored embeddings would get content hashes backfilled.")
+    print(
+        f"  {report['texts_to_embed']} texts to embed in {report['api_calls']} API call(s) "
+        f"of up to {resource_manager.EMBED_BATCH_SIZE}."
+    )
+
+
+def prefetch_publication_metadata(verbose: bool = True, *, title_fallback: bool = True) -> None:
+    publications = (
+        read_csv(PUBLICATIONS_PATH)
+        .dropna(subset=["Title"])
+        .drop_duplicates(subset=["Title"])
+    )
+    if verbose:
+        print(f"Prefetching OpenAlex metadata for {len(publications)} publications…")
+    started = time.perf_counter()
+    stats = prefetch_works(
+        list(zip(publications["Title"], publications["Link"])),
+        title_fallback=title_fallback,
+    )
+    if verbose:
+        print(
+            f"OpenAlex cache filled in {time.perf_counter() - started:.1f}s: "
+            f"{stats['cached']} already cached, {stats['by_pmcid']} by PMCID, "
+            f"{stats['by_title']} by title search, {stats['missing']} unresolved."
+        )
+
+
+def build_resources(verbose: bool = True, *, refresh_sources: bool = False) -> None:
     if verbose:
         print("Loading resources and ensuring embeddings…")
-    _load_resources()
-    save_repository_snapshot(RESOURCE_PATH)
+    # build_keyword_index and build_cross_links rebuild those indexes afterwards.
+    _load_resources(refresh_sources=refresh_sources, text_indexes=False, persist=False)
+    save_repository_snapshot(SNAPSHOT_DIR)
+    if verbose:
+        print(
+            f"Resource snapshot stored at {SNAPSHOT_DIR} "
+            f"({len(resource_manager.RESOURCES)} records)."
+        )
+
+
+PDF_DOWNLOAD_WORKERS = 8
+
+
+def _paper_pdf_urls() -> List[str]:
+    return sorted(
+        {
+            resource.pdf_url
+            for resource in resource_manager.RESOURCES.values()
+            if isinstance(resource, PaperResource) and resource.pdf_url
+        }
+    )
+
+
+def extract_pdf_texts(verbose: bool = True, *, workers: Optional[int] = None) -> None:
+    """Download every paper's PDF and extract its text into the PDF text store.
+
+    Downloads run on threads (the request scheduler paces each host); pypdf runs
+    in a process pool so parsing uses every core. PDFs go to a private cache
+    without an eviction budget, so blobs waiting for a parser are never evicted
+    and the PDFs interactive sessions cached are left alone; each blob is
+    removed once parsed.
+    """
+    urls = _paper_pdf_urls()
+    stored = PDF_TEXT_STORE.known_urls(urls)
+    pending = [url for url in urls if url not in stored]
+    if verbose:
+        print(
+            f"Extracting PDF text for {len(pending)} papers "
+            f"({len(urls) - len(pending)} already stored)…"
+        )
+    if not pending:
+        return
+
+    started = time.perf_counter()
+    stats = dict.fromkeys(("extracted", "deduplicated", "empty", "too_large", "failed"), 0)
+    extractions: Dict[Future, str] = {}
+    # Digest -> URLs serving that file; mirrors are parsed once.
+    sources: Dict[str, List[str]] = {}
+    # Spawned workers start clean instead of forking a process that already runs
+    # threads and holds open SQLite connections.
+    with tempfile.TemporaryDirectory(prefix="pdf_extract_") as scratch, ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as parsers, ThreadPoolExecutor(max_workers=PDF_DOWNLOAD_WORKERS) as downloaders:
+        cache = PdfCache(Path(scratch), max_bytes=sys.maxsize)
+        downloads = {
+            downloaders.submit(
+                download_pdf, url, max_bytes=PDF_TEXT_MAX_BYTES, cache=cache
+            ): url
+            for url in pending
+        }
+        for future in as_completed(downloads):
+            url = downloads[future]
+            try:
+                path = future.result()
+            except PdfTooLargeError:
+                stats["too_large"] += 1
+                continue
+            except Exception as exc:  # noqa: BLE001
+                print(f"  Unable to download {url}: {exc}")
+                stats["failed"] += 1
+                continue
+            try:
+                too_large = path.stat().st_size > PDF_TEXT_MAX_BYTES
+            except OSError as exc:
+                print(f"  Unable to read the download of {url}: {exc}")
+                stats["failed"] += 1
+                continue
+            if too_large:
+                stats["too_large"] += 1
+                continue
+            # The PDF cache names blobs after their SHA-256 digest.
+            digest = path.stem
+            if digest in sources or PDF_TEXT_STORE.link(url, digest):
+                sources.setdefault(digest, []).append(url)
+                stats["deduplicated"] += 1
+                continue
+            sources[digest] = [url]
+            extraction = parsers.submit(extract_pdf_text, str(path))
+            extraction.add_done_callback(lambda _, path=path: path.unlink(missing_ok=True))
+            extractions[extraction] = digest
+
+        for future in as_completed(extractions):
+            digest = extractions[future]
+            try:
+                text = future.result()
+            except Exception as exc:  # noqa: BLE001
+                print(f"  Unable to extract text from {sources[digest][0]}: {exc}")
+                stats["failed"] += len(sources[digest])
+                continue
+            PDF_TEXT_STORE.put_many([(url, digest, text) for url in sources[digest]])
+            stats["extracted" if text else "empty"] += 1
+
+    if verbose:
+        print(
+            f"PDF text stored in {time.perf_counter() - started:.1f}s: "
+            f"{stats['extracted']} extracted, {stats['deduplicated']} shared with a mirror, "
+            f"{stats['empty']} without text, {stats['too_large']} too large, "
+            f"{stats['failed']} failed."
+        )
+
+
+def embed_pdf_chunks(verbose: bool = True) -> None:
+    """Precompute the chunk embeddings the paper Q&A tab would build on first use."""
+    client = _get_openai_client()
+    if client is None:
+        print("OpenAI API key missing; skipping PDF chunk embeddings.")
+        return
+
+    texts = {url: PDF_TEXT_STORE.get_by_url(url) for url in _paper_pdf_urls()}
+    started = time.perf_counter()
+    builds = {}
+    stored = 0
+    for text in texts.values():
+        if not text:
+            continue
+        key, build = start_pdf_index(text, client)
+        if build is None:
+            stored += 1
+        else:
+            builds[key] = build
+    if verbose:
+        print(f"Embedding PDF chunks for {len(builds)} papers ({stored} already stored)…")
+    if not builds:
+        return
+
+    embedded = failed = 0
+    for build in builds.values():
+        build.wait()
+        if build.error is not None:
+            print(f"  Unable to embed PDF chunks: {build.error}")
+            failed += 1
+            continue
+        index = build.snapshot()
+        embedded += len(index["chunks"]) if index else 0
+    if verbose:
+        print(
+            f"Stored {embedded} chunk embeddings in {time.perf_counter() - started:.1f}s "
+            f"({failed} papers failed)."
+        )
+
+
+def _paper_passages():
+    """Yield ``(resource_id, chunks, embeddings)`` for papers with a complete chunk index."""
+    for resource_id, resource in sorted(resource_manager.RESOURCES.items()):
+        if not isinstance(resource, PaperResource) or not resource.pdf_url:
+            continue
+        text = PDF_TEXT_STORE.get_by_url(resource.pdf_url)
+        if not text:
+            continue
+        key = chunk_index_key(
+            text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, model=CHUNK_EMBED_MODEL
+        )
+        index = CHUNK_INDEX.get(key)
+        if index is not None and not index["truncated"]:
+            yield resource_id, index["chunks"], index["embeddings"]
+
+
+def build_passage_index(verbose: bool = True) -> None:
+    if verbose:
+        print("Building corpus-wide passage index from PDF chunk embeddings…")
+    started = time.perf_counter()
+    index = PassageIndex.write(PASSAGE_INDEX_DIR, _paper_passages(), model=CHUNK_EMBED_MODEL)
+    if index is None:
+        print("No embedded PDF passages available; skipping passage index.")
+        return
+    if verbose:
+        print(
+            f"Passage index saved to {PASSAGE_INDEX_DIR} ({index.passage_count} passages "
+            f"from {index.paper_count} papers, "
+            f"{'IVF' if index.ann is not None else 'exact'} search) "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+
+def build_keyword_index(verbose: bool = True) -> None:
+    if verbose:
+        print("Building BM25 keyword index from cached metadata…")
+    index = build_lexical_index()
+    index.save(LEXICAL_INDEX_PATH)
+    resource_manager.LEXICAL_INDEX = index
+    if verbose:
+        print(
+            f"Keyword index saved to {LEXICAL_INDEX_PATH} "
+            f"({index.document_count} documents, {len(index.vocabulary)} terms)."
+        )
+
+
+def build_cross_links(verbose: bool = True) -> None:
+    if verbose:
+        print("Linking experiments to publications…")
+    index, stats = build_link_index()
+    index.save(LINK_INDEX_PATH)
+    resource_manager.LINK_INDEX = index
+    if verbose:
+        print(
+            f"Link index saved to {LINK_INDEX_PATH} ({index.edge_count} links; "
+            f"titles matched {stats['exact']} exactly, {stats['normalized']} normalized, "
+            f"{stats['fuzzy']} fuzzy, {stats['missing']} unmatched)."
+        )
+
+
+def build_ann_index(
+    verbose: bool = True,
+    *,
+    n_lists: Optional[int] = None,
+    nprobe: int = DEFAULT_NPROBE,
+    recall_queries: int = 200,
+    k: int = 10,
+) -> None:
+    matrix = resource_manager.EMBEDDING_MATRIX
+    row_ids = resource_manager.EMBEDDING_ROW_IDS
+    if matrix.shape[0] == 0:
+        print("No embeddings available; skipping ANN index.")
+        return
+
     if verbose:
-        print(f"Resource snapshot stored at {RESOURCE_PATH} ({len(RESOURCES)} records).")
+        print(f"Building IVF index over {matrix.shape[0]} embeddings…")
+    started = time.perf_counter()
+    index = IVFIndex.build(matrix, row_ids, n_lists=n_lists)
+    index.save(ANN_INDEX_PATH)
+    if not verbose:
+        return
+
+    print(
+        f"ANN index saved to {ANN_INDEX_PATH} with {index.n_lists} lists "
+        f"in {time.perf_counter() - started:.1f}s."
+    )
+
+    # Compare against the exact path using corpus vectors as stand-in queries,
+    # leaving out each query's own row so the self-match does not count as a hit.
+    rng = np.random.default_rng(0)
+    sample = np.sort(
+        rng.choice(matrix.shape[0], size=min(recall_queries, matrix.shape[0]), replace=False)
+    )
+    queries = np.asarray(matrix[sample], dtype=np.float32)
+    for probe in sorted({1, max(1, nprobe // 2), nprobe, nprobe * 2}):
+        recall = recall_at_k(index, matrix, queries, k, nprobe=probe, query_rows=sample)
+        print(f"  nprobe={probe:<4} recall@{k}={recall:.3f}")
 
 
 def build_similarity_graph(verbose: bool = True) -> None:
@@ -43,6 +362,15 @@ def build_similarity_graph(verbose: bool = True) -> None:
         )
 
 
+def report_request_stats() -> None:
+    for host, counters in sorted(SCHEDULER.stats().items()):
+        print(
+            f"{host}: {counters['requests']:.0f} requests, {counters['retries']:.0f} retries "
+            f"({counters['throttled']:.0f} throttled), {counters['failures']:.0f} failures, "
+            f"{counters['wait_seconds']:.1f}s waiting for budget."
+        )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Build cached artifacts for BioScholar.")
     parser.add_argument(
@@ -55,17 +383,87 @@ def main() -> None:
         action="store_true",
         help="Refresh the resource snapshot but skip similarity graph generation.",
     )
+    parser.add_argument(
+        "--refresh-sources",
+        action="store_true",
+        help="Re-read the publications CSV and OSDR export and re-embed only changed items.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many embedding API calls a refresh would take.",
+    )
+    parser.add_argument(
+        "--skip-prefetch",
+        action="store_true",
+        help="Do not bulk-fetch OpenAlex metadata for the publications CSV.",
+    )
+    parser.add_argument(
+        "--no-title-fallback",
+        action="store_true",
+        help="During prefetch, skip the per-title search for papers not found by PMCID.",
+    )
+    parser.add_argument(
+        "--skip-pdf-text",
+        action="store_true",
+        help="Do not download PDFs and extract their text for the paper Q&A tab.",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=None,
+        help="Processes used for PDF text extraction (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "--skip-chunk-embeddings",
+        action="store_true",
+        help="Do not precompute the paper Q&A chunk embeddings for extracted PDF text.",
+    )
+    parser.add_argument(
+        "--skip-ann",
+        action="store_true",
+        help="Do not rebuild the approximate nearest-neighbour index.",
+    )
+    parser.add_argument(
+        "--ann-lists",
+        type=int,
+        default=None,
+        help="Number of IVF lists (defaults to sqrt of the corpus size).",
+    )
+    parser.add_argument(
+        "--ann-nprobe",
+        type=int,
+        default=DEFAULT_NPROBE,
+        help="nprobe around which the recall@k comparison is reported.",
+    )
     args = parser.parse_args()
 
     if args.graph_only and args.resources_only:
         parser.error("Choose either --graph-only or --resources-only, not both.")
 
+    if args.dry_run:
+        report_embedding_refresh(refresh_sources=args.refresh_sources)
+        return
+
     if not args.graph_only:
-        build_resources()
+        if not args.skip_prefetch:
+            prefetch_publication_metadata(title_fallback=not args.no_title_fallback)
+        build_resources(refresh_sources=args.refresh_sources)
+        if not args.skip_pdf_text:
+            extract_pdf_texts(workers=args.pdf_workers)
+            if not args.skip_chunk_embeddings:
+                embed_pdf_chunks()
+            build_passage_index()
+        build_keyword_index()
+        build_cross_links()
+        if not args.skip_ann:
+            build_ann_index(n_lists=args.ann_lists, nprobe=args.ann_nprobe)
 
     if not args.resources_only:
         build_similarity_graph()
 
+    report_request_stats()
+
 
 if __name__ == "__main__":
     main()
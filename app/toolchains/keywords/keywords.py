@@ -2,7 +2,7 @@ from utils.embedding_store import (
     get_embeddings_for_texts,
     load_embedding_store,
 )
-from utils.resource_manager import RESOURCES
+import utils.resource_manager as R
 
 from sentence_transformers import SentenceTransformer
 
@@ -21,9 +21,10 @@ def load_embedder(model_name: str) -> SentenceTransformer:
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 
+R.ensure_resources_loaded()
 all_descriptions = {
     id: f"{resource.title}\n{resource.abstract}"
-    for id, resource in list(RESOURCES.items())
+    for id, resource in list(R.RESOURCES.items())
 }
 
 
@@ -0,0 +1,235 @@
+"""Inverted-file (IVF) index for approximate nearest-neighbour search over embeddings."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+INDEX_FORMAT_VERSION = 1
+
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 20
+KMEANS_TRAINING_POINTS_PER_LIST = 64
+ASSIGN_BATCH_SIZE = 16384
+
+
+def default_list_count(row_count: int) -> int:
+    """Return the usual ``sqrt(n)`` number of coarse clusters for a corpus."""
+    return max(1, int(np.sqrt(max(row_count, 1))))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[~np.isfinite(norms) | (norms == 0.0)] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign each row to the centroid with the highest inner product."""
+    assignments = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], ASSIGN_BATCH_SIZE):
+        block = np.asarray(matrix[start : start + ASSIGN_BATCH_SIZE], dtype=np.float32)
+        assignments[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(
+    matrix: np.ndarray,
+    n_lists: int,
+    *,
+    iterations: int = KMEANS_ITERATIONS,
+    seed: int = 0,
+) -> np.ndarray:
+    """Run spherical k-means on a sample of ``matrix`` and return unit centroids."""
+    rng = np.random.default_rng(seed)
+    row_count = matrix.shape[0]
+    n_lists = max(1, min(n_lists, row_count))
+
+    sample_size = min(row_count, n_lists * KMEANS_TRAINING_POINTS_PER_LIST)
+    sample_rows = np.sort(rng.choice(row_count, size=sample_size, replace=False))
+    sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            sums[empty] = sample[rng.choice(sample_size, size=empty.size, replace=False)]
+        centroids = _normalize_rows(sums)
+
+    return centroids
+
+
+class IVFIndex:
+    """Coarse-quantized inverted lists over the rows of an embedding matrix.
+
+    The index only stores row numbers; vectors are read from the matrix passed to
+    :meth:`search`, so it can sit next to an in-memory or memory-mapped matrix.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        row_ids: np.ndarray,
+    ):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        row_ids: np.ndarray,
+        *,
+        n_lists: Optional[int] = None,
+        iterations: int = KMEANS_ITERATIONS,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        if matrix.shape[0] == 0:
+            raise ValueError("Cannot build an ANN index over an empty matrix.")
+        if n_lists is None:
+            n_lists = default_list_count(matrix.shape[0])
+
+        centroids = train_centroids(matrix, n_lists, iterations=iterations, seed=seed)
+        assignments = _assign(matrix, centroids)
+
+        list_rows = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=centroids.shape[0])
+        list_offsets = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        np.cumsum(counts, out=list_offsets[1:])
+        return cls(centroids, list_offsets, list_rows, row_ids)
+
+    def matches(self, row_ids: np.ndarray) -> bool:
+        """Check that the index was built for the given matrix row layout."""
+        return self.row_ids.shape == row_ids.shape and bool(
+            np.array_equal(self.row_ids, row_ids)
+        )
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int = DEFAULT_NPROBE) -> np.ndarray:
+        """Return the matrix rows stored in the ``nprobe`` lists closest to ``query``."""
+        nprobe = max(1, min(nprobe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        if nprobe < self.n_lists:
+            probed = np.argpartition(centroid_scores, -nprobe)[-nprobe:]
+        else:
+            probed = np.arange(self.n_lists)
+        slices = [
+            self.list_rows[self.list_offsets[lst] : self.list_offsets[lst + 1]]
+            for lst in probed
+        ]
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        *,
+        nprobe: int = DEFAULT_NPROBE,
+        row_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` of the approximate top-``k`` rows, best first."""
+        rows = self.candidate_rows(query, nprobe)
+        if row_mask is not None and rows.size:
+            rows = rows[row_mask[rows]]
+        if rows.size == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Ascending row order keeps the gather sequential on memory-mapped matrices.
+        rows = np.sort(rows)
+        scores = np.asarray(matrix[rows], dtype=np.float32) @ query
+        k = min(k, rows.size)
+        if k < rows.size:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(rows.size)
+        top = top[np.argsort(scores[top])[::-1]]
+        return rows[top], scores[top]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.int64(INDEX_FORMAT_VERSION),
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows,
+                row_ids=self.row_ids,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IVFIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_FORMAT_VERSION:
+                    return None
+                return cls(
+                    data["centroids"],
+                    data["list_offsets"],
+                    data["list_rows"],
+                    data["row_ids"],
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = np.asarray(matrix, dtype=np.float32) @ query
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(scores, -k)[-k:]
+    return top[np.argsort(scores[top])[::-1]]
+
+
+def recall_at_k(
+    index: IVFIndex,
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    *,
+    nprobe: int = DEFAULT_NPROBE,
+    query_rows: Optional[np.ndarray] = None,
+) -> float:
+    """Average fraction of the exact top-``k`` rows that the index also returns.
+
+    When the queries are rows of ``matrix``, pass their row numbers as
+    ``query_rows``: each query's own row is then left out of both result lists,
+    since it is trivially found and would inflate the recall.
+    """
+    if queries.shape[0] == 0:
+        return 0.0
+    hits = 0
+    expected_total = 0
+    for position, query in enumerate(queries):
+        if query_rows is None:
+            expected = exact_top_k(matrix, query, k)
+            found, _ = index.search(matrix, query, k, nprobe=nprobe)
+        else:
+            own_row = query_rows[position]
+            expected = exact_top_k(matrix, query, k + 1)
+            expected = expected[expected != own_row][:k]
+            found, _ = index.search(matrix, query, k + 1, nprobe=nprobe)
+            found = found[found != own_row][:k]
+        hits += np.intersect1d(expected, found).size
+        expected_total += expected.size
+    return hits / expected_total if expected_total else 0.0
@@ -0,0 +1,136 @@
+"""Process-wide semantic cache of paper Q&A answers.
+
+A question hits when an earlier question about the same resource has an
+embedding at least ``ANSWER_CACHE_THRESHOLD`` cosine-similar, the entry is
+younger than ``ANSWER_CACHE_TTL_SECONDS`` and the paper's chunk index is the
+one the answer was grounded in. A different index key drops every entry for
+that resource.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE = 64
+ANSWER_CACHE_MAX_SCOPES = 512
+
+
+class CachedAnswer(NamedTuple):
+    question: str
+    answer: str
+    passages: List[Dict[str, Any]]
+    similarity: float
+    created_at: float
+
+
+class _Scope:
+    def __init__(self, index_key: str, dim: int):
+        self.index_key = index_key
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.entries: List[CachedAnswer] = []
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        *,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        max_entries_per_scope: int = ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE,
+        max_scopes: int = ANSWER_CACHE_MAX_SCOPES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self._clock = clock
+        self._scopes: "OrderedDict[Hashable, _Scope]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("hits", "misses", "expired", "invalidated", "stored"), 0)
+
+    def _scope(self, scope: Hashable, index_key: str) -> Optional[_Scope]:
+        entry = self._scopes.get(scope)
+        if entry is None:
+            return None
+        if entry.index_key != index_key:
+            self._counters["invalidated"] += len(entry.entries)
+            del self._scopes[scope]
+            return None
+        self._scopes.move_to_end(scope)
+        return entry
+
+    def _drop_expired(self, entry: _Scope) -> None:
+        cutoff = self._clock() - self.ttl_seconds
+        keep = [i for i, cached in enumerate(entry.entries) if cached.created_at >= cutoff]
+        if len(keep) == len(entry.entries):
+            return
+        self._counters["expired"] += len(entry.entries) - len(keep)
+        entry.entries = [entry.entries[i] for i in keep]
+        entry.vectors = entry.vectors[keep]
+
+    def lookup(
+        self, scope: Hashable, index_key: str, vector: np.ndarray
+    ) -> Optional[CachedAnswer]:
+        """Return the most similar fresh answer for ``scope``, or ``None`` on a miss."""
+        query = _unit(vector)
+        with self._lock:
+            entry = self._scope(scope, index_key)
+            if entry is not None:
+                self._drop_expired(entry)
+            if entry is None or not entry.entries or entry.vectors.shape[1] != query.shape[0]:
+                self._counters["misses"] += 1
+                return None
+            similarities = entry.vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            return entry.entries[best]._replace(similarity=float(similarities[best]))
+
+    def store(
+        self,
+        scope: Hashable,
+        index_key: str,
+        question: str,
+        vector: np.ndarray,
+        answer: str,
+        passages: List[Dict[str, Any]],
+    ) -> None:
+        query = _unit(vector)
+        cached = CachedAnswer(question, answer, list(passages), 1.0, self._clock())
+        with self._lock:
+            entry = self._scope(scope, index_key)
+            if entry is None or entry.vectors.shape[1] != query.shape[0]:
+                entry = self._scopes[scope] = _Scope(index_key, query.shape[0])
+            entry.entries.append(cached)
+            entry.vectors = np.vstack([entry.vectors, query[None, :]])
+            if len(entry.entries) > self.max_entries_per_scope:
+                entry.entries = entry.entries[-self.max_entries_per_scope :]
+                entry.vectors = entry.vectors[-self.max_entries_per_scope :]
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+            self._counters["stored"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats: Dict[str, float] = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+ANSWER_CACHE = SemanticAnswerCache()
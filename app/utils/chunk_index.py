@@ -0,0 +1,145 @@
+"""Persistent PDF chunk embeddings shared by every session.
+
+Entries are keyed by the SHA-256 of the paper text, the chunking parameters
+and the embedding model, so each paper is chunked and embedded once per
+configuration instead of once per session. Embeddings are stored as
+pre-normalized float32 matrices; ``scripts/build_artifacts.py`` can precompute
+them for the corpus.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from utils.config import CHUNK_INDEX_PATH
+
+CHUNK_INDEX_MAX_ENTRIES = 64
+# Bumped whenever stored embeddings change meaning; v2 rows are unit-length.
+CHUNK_INDEX_FORMAT_VERSION = 2
+
+
+def chunk_index_key(text: str, *, chunk_size: int, overlap: int, model: str) -> str:
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"v{CHUNK_INDEX_FORMAT_VERSION}:{text_hash}:{chunk_size}:{overlap}:{model}"
+
+
+class ChunkIndexStore:
+    """In-memory LRU of chunk indexes in front of an optional SQLite table.
+
+    An index is ``{"key": str, "chunks": [...], "embeddings": float32 matrix,
+    "truncated": bool}``;
+    embedding rows are unit-length so retrieval needs no norms.
+    """
+
+    def __init__(self, max_entries: int = CHUNK_INDEX_MAX_ENTRIES, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = self._open_db(path)
+
+    @staticmethod
+    def _open_db(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_indexes ("
+                "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, truncated INTEGER NOT NULL, "
+                "chunks BLOB NOT NULL, embeddings BLOB NOT NULL)"
+            )
+            db.commit()
+        except sqlite3.Error as exc:
+            print(f"Chunk embedding index running in memory only: {exc}")
+            return None
+        return db
+
+    def _remember(self, key: str, index: Dict[str, Any]) -> None:
+        self._entries[key] = index
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                return index
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT dim, truncated, chunks, embeddings FROM chunk_indexes WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            dim, truncated, chunks, embeddings = row
+            index = {
+                "key": key,
+                "chunks": json.loads(zlib.decompress(chunks)),
+                "embeddings": np.frombuffer(embeddings, dtype=np.float32).reshape(-1, dim),
+                "truncated": bool(truncated),
+            }
+            self._remember(key, index)
+            return index
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+            if self._db is None:
+                return False
+            try:
+                row = self._db.execute(
+                    "SELECT 1 FROM chunk_indexes WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return False
+            return row is not None
+
+    def put(self, key: str, index: Dict[str, Any]) -> Dict[str, Any]:
+        embeddings = np.ascontiguousarray(index["embeddings"], dtype=np.float32)
+        index = {
+            "key": key,
+            "chunks": list(index["chunks"]),
+            "embeddings": embeddings,
+            "truncated": bool(index.get("truncated")),
+        }
+        with self._lock:
+            self._remember(key, index)
+            if self._db is None:
+                return index
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO chunk_indexes "
+                    "(key, dim, truncated, chunks, embeddings) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        int(embeddings.shape[1]),
+                        int(index["truncated"]),
+                        zlib.compress(json.dumps(index["chunks"]).encode("utf-8")),
+                        embeddings.tobytes(),
+                    ),
+                )
+                self._db.commit()
+            except sqlite3.Error as exc:
+                print(f"Unable to persist chunk embeddings: {exc}")
+        return index
+
+
+CHUNK_INDEX = ChunkIndexStore(path=CHUNK_INDEX_PATH)
@@ -5,7 +5,20 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 PUBLICATIONS_PATH = DATA_DIR / "SB_publication_PMC.csv"
 EXPERIMENTS_PATH = DATA_DIR / "osd_experiment_data.pkl"
+SNAPSHOT_DIR = DATA_DIR / "resources"
+# Pickled snapshot written by earlier versions; migrated to SNAPSHOT_DIR on first load.
 RESOURCE_PATH = DATA_DIR / "resources.pkl"
+ANN_INDEX_PATH = SNAPSHOT_DIR / "ann_ivf.npz"
+LEXICAL_INDEX_PATH = SNAPSHOT_DIR / "lexical_bm25.npz"
+LINK_INDEX_PATH = SNAPSHOT_DIR / "links.npz"
+PASSAGE_INDEX_DIR = SNAPSHOT_DIR / "passages"
+QUERY_CACHE_PATH = DATA_DIR / "query_embeddings.sqlite"
+PDF_CACHE_DIR = DATA_DIR / "pdf_cache"
+PDF_TEXT_STORE_PATH = DATA_DIR / "pdf_text.sqlite"
+CHUNK_INDEX_PATH = DATA_DIR / "chunk_embeddings.sqlite"
+OPENALEX_STORE_PATH = DATA_DIR / "openalex_cache.sqlite"
+# JSON cache written by earlier versions; imported into OPENALEX_STORE_PATH once.
+OPENALEX_JSON_CACHE_PATH = DATA_DIR / "openalex_cache.json"
 SIM_GRAPH = DATA_DIR / "similarity_graph.json"
 
 LOGO_PATH = BASE_DIR / "images" / "logo.png"
@@ -0,0 +1,177 @@
+"""BM25 inverted index for offline keyword search over resource text."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# v2: the index records a hash of the indexed text so edits invalidate it.
+INDEX_FORMAT_VERSION = 2
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the their this to "
+    "was were which with".split()
+)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(str(text).lower())
+        if token not in STOPWORDS
+    ]
+
+
+def documents_hash(documents: Iterable[Tuple[int, str]]) -> str:
+    """Hash ``(resource_id, text)`` pairs; any id or text change alters it."""
+    digest = hashlib.sha1()
+    for resource_id, text in documents:
+        digest.update(f"{resource_id}\0{text}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LexicalIndex:
+    """CSR postings with precomputed BM25 weights per (term, document) pair.
+
+    Because every posting already carries ``idf * tf-saturation``, scoring a query
+    is a single ``bincount`` over the postings of its terms.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        postings_offsets: np.ndarray,
+        postings_rows: np.ndarray,
+        postings_weights: np.ndarray,
+        row_ids: np.ndarray,
+        content_hash: str = "",
+    ):
+        self.terms = np.asarray(terms, dtype=str)
+        self.postings_offsets = np.asarray(postings_offsets, dtype=np.int64)
+        self.postings_rows = np.asarray(postings_rows, dtype=np.int64)
+        self.postings_weights = np.asarray(postings_weights, dtype=np.float32)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.content_hash = str(content_hash)
+        self.vocabulary: Dict[str, int] = {
+            term: position for position, term in enumerate(self.terms.tolist())
+        }
+
+    @property
+    def document_count(self) -> int:
+        return int(self.row_ids.shape[0])
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, str]]) -> "LexicalIndex":
+        documents = list(documents)
+        row_ids: List[int] = []
+        doc_term_counts: List[Dict[str, int]] = []
+        for resource_id, text in documents:
+            counts: Dict[str, int] = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            row_ids.append(resource_id)
+            doc_term_counts.append(counts)
+
+        doc_lengths = np.asarray(
+            [sum(counts.values()) for counts in doc_term_counts], dtype=np.float32
+        )
+        average_length = float(doc_lengths.mean()) if doc_lengths.size else 0.0
+        if average_length <= 0.0:
+            average_length = 1.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row, counts in enumerate(doc_term_counts):
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((row, count))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows_parts: List[np.ndarray] = []
+        weight_parts: List[np.ndarray] = []
+        document_count = len(row_ids)
+        for position, term in enumerate(terms):
+            entries = np.asarray(postings[term], dtype=np.int64)
+            rows = entries[:, 0]
+            tf = entries[:, 1].astype(np.float32)
+            df = rows.shape[0]
+            idf = np.log(1.0 + (document_count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths[rows] / average_length)
+            rows_parts.append(rows)
+            weight_parts.append((idf * tf * (BM25_K1 + 1.0) / (tf + norm)).astype(np.float32))
+            offsets[position + 1] = offsets[position] + df
+
+        return cls(
+            np.asarray(terms, dtype=str),
+            offsets,
+            np.concatenate(rows_parts) if rows_parts else np.zeros(0, dtype=np.int64),
+            np.concatenate(weight_parts) if weight_parts else np.zeros(0, dtype=np.float32),
+            np.asarray(row_ids, dtype=np.int64),
+            documents_hash(documents),
+        )
+
+    def matches(self, content_hash: str) -> bool:
+        return self.content_hash == content_hash
+
+    def score(self, query: str) -> np.ndarray:
+        """Return one BM25 score per indexed document."""
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return np.zeros(self.document_count, dtype=np.float32)
+        rows = np.concatenate(
+            [self.postings_rows[self.postings_offsets[t] : self.postings_offsets[t + 1]] for t in term_ids]
+        )
+        weights = np.concatenate(
+            [self.postings_weights[self.postings_offsets[t] : self.postings_offsets[t + 1]] for t in term_ids]
+        )
+        return np.bincount(rows, weights=weights, minlength=self.document_count).astype(np.float32)
+
+    def ranked(self, query: str) -> Iterable[Tuple[int, float]]:
+        """Yield ``(resource_id, score)`` for every matching document, best first."""
+        scores = self.score(query)
+        matched = np.flatnonzero(scores > 0.0)
+        order = matched[np.argsort(scores[matched], kind="stable")[::-1]]
+        for row in order.tolist():
+            yield int(self.row_ids[row]), float(scores[row])
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.int64(INDEX_FORMAT_VERSION),
+                terms=self.terms,
+                postings_offsets=self.postings_offsets,
+                postings_rows=self.postings_rows,
+                postings_weights=self.postings_weights,
+                row_ids=self.row_ids,
+                content_hash=np.str_(self.content_hash),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LexicalIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_FORMAT_VERSION:
+                    return None
+                return cls(
+                    data["terms"],
+                    data["postings_offsets"],
+                    data["postings_rows"],
+                    data["postings_weights"],
+                    data["row_ids"],
+                    str(data["content_hash"]),
+                )
+        except (OSError, KeyError, ValueError):
+            return None
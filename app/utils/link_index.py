@@ -0,0 +1,129 @@
+"""Experiment↔publication cross-links stored as a symmetric CSR adjacency."""
+
+from __future__ import annotations
+
+import difflib
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INDEX_FORMAT_VERSION = 1
+
+# Minimum difflib ratio between normalized titles to accept a fuzzy match.
+FUZZY_TITLE_CUTOFF = 0.9
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Fold case, accents, punctuation and whitespace so title variants compare equal."""
+    if not title:
+        return ""
+    text = unicodedata.normalize("NFKD", str(title))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", text.casefold()).strip()
+
+
+class TitleMatcher:
+    """Resolve free-text titles to resource ids: exact, then normalized, then fuzzy."""
+
+    def __init__(self, titles: Iterable[Tuple[str, int]], cutoff: float = FUZZY_TITLE_CUTOFF):
+        self.cutoff = cutoff
+        self._exact: Dict[str, int] = {}
+        self._normalized: Dict[str, int] = {}
+        for title, resource_id in titles:
+            self._exact.setdefault(title, resource_id)
+            key = normalize_title(title)
+            if key:
+                self._normalized.setdefault(key, resource_id)
+        self._candidates: List[str] = list(self._normalized)
+        self.stats = dict.fromkeys(("exact", "normalized", "fuzzy", "missing"), 0)
+
+    def match(self, title: Optional[str]) -> Optional[int]:
+        if not title:
+            return None
+        resource_id = self._exact.get(title)
+        if resource_id is not None:
+            self.stats["exact"] += 1
+            return resource_id
+        key = normalize_title(title)
+        if not key:
+            self.stats["missing"] += 1
+            return None
+        resource_id = self._normalized.get(key)
+        if resource_id is not None:
+            self.stats["normalized"] += 1
+            return resource_id
+        close = difflib.get_close_matches(key, self._candidates, n=1, cutoff=self.cutoff)
+        if close:
+            self.stats["fuzzy"] += 1
+            return self._normalized[close[0]]
+        self.stats["missing"] += 1
+        return None
+
+
+class LinkIndex:
+    """Neighbours of resource ``i`` are ``neighbors[offsets[i]:offsets[i + 1]]``.
+
+    Every experiment→publication edge is stored in both directions, so the same
+    lookup answers "publications of this experiment" and "experiments using this
+    paper". ``row_ids`` records the resource ids the index was built for.
+    """
+
+    def __init__(self, offsets: np.ndarray, neighbors: np.ndarray, row_ids: np.ndarray):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+
+    @classmethod
+    def build(cls, edges: Iterable[Tuple[int, int]], row_ids: Sequence[int]) -> "LinkIndex":
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        size = int(row_ids.max()) + 1 if row_ids.size else 0
+
+        pairs = np.asarray(sorted(set(edges)), dtype=np.int64).reshape(-1, 2)
+        sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+        return cls(offsets, targets, row_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.neighbors.shape[0] // 2)
+
+    def matches(self, row_ids: np.ndarray) -> bool:
+        return self.row_ids.shape == row_ids.shape and bool(np.array_equal(self.row_ids, row_ids))
+
+    def neighbors_of(self, resource_id: int) -> np.ndarray:
+        if resource_id < 0 or resource_id + 1 >= self.offsets.shape[0]:
+            return self.neighbors[:0]
+        return self.neighbors[self.offsets[resource_id] : self.offsets[resource_id + 1]]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.int64(INDEX_FORMAT_VERSION),
+                offsets=self.offsets,
+                neighbors=self.neighbors,
+                row_ids=self.row_ids,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LinkIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_FORMAT_VERSION:
+                    return None
+                return cls(data["offsets"], data["neighbors"], data["row_ids"])
+        except (OSError, KeyError, ValueError):
+            return None
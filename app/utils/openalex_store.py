@@ -0,0 +1,311 @@
+"""SQLite store for OpenAlex works, indexed by OpenAlex id and by paper title."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ModuleNotFoundError:  # pragma: no cover - compression is optional
+    zstandard = None
+
+WORK_CACHE_MAX_ENTRIES = 2048
+
+# SQLite caps the number of bound parameters per statement.
+_QUERY_CHUNK = 500
+
+
+def _chunked(items: Sequence[str], size: int) -> Iterable[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class OpenAlexStore:
+    """Works are stored once per OpenAlex id; titles map onto those ids.
+
+    Payloads are compact JSON, zstd-compressed when ``zstandard`` is installed.
+    Every ``put`` is a single transaction, so callers should hand over a whole
+    batch of works at once.
+    """
+
+    def __init__(self, path: Optional[Path], *, compress: bool = True):
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=3) if compress and zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self._db = self._open_db(path)
+
+    @staticmethod
+    def _open_db(path: Optional[Path]) -> sqlite3.Connection:
+        db = None
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(path), check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.Error as exc:
+                print(f"OpenAlex store running in memory only: {exc}")
+                db = None
+        if db is None:
+            db = sqlite3.connect(":memory:", check_same_thread=False)
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS works ("
+            "id TEXT PRIMARY KEY, codec TEXT NOT NULL, payload BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "title TEXT PRIMARY KEY, work_id TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        db.commit()
+        return db
+
+    def _encode(self, work: Dict[str, Any]) -> tuple:
+        payload = json.dumps(work, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self._compressor is not None:
+            return "zstd", self._compressor.compress(payload)
+        return "json", payload
+
+    def _decode(self, codec: str, payload: bytes) -> Optional[Dict[str, Any]]:
+        if codec == "zstd":
+            if self._decompressor is None:
+                return None
+            payload = self._decompressor.decompress(payload)
+        return json.loads(payload)
+
+    def get_by_id(self, work_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT codec, payload FROM works WHERE id = ?", (work_id,)
+            ).fetchone()
+        return self._decode(*row) if row else None
+
+    def get_by_title(self, title: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT works.codec, works.payload FROM titles "
+                "JOIN works ON works.id = titles.work_id WHERE titles.title = ?",
+                (title,),
+            ).fetchone()
+        return self._decode(*row) if row else None
+
+    def get_many_by_id(self, work_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(work_ids))
+        with self._lock:
+            rows = []
+            for chunk in _chunked(unique_ids, _QUERY_CHUNK):
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(
+                    self._db.execute(
+                        f"SELECT id, codec, payload FROM works WHERE id IN ({placeholders})",
+                        tuple(chunk),
+                    ).fetchall()
+                )
+        for work_id, codec, payload in rows:
+            work = self._decode(codec, payload)
+            if work is not None:
+                found[work_id] = work
+        return found
+
+    def _existing(self, table: str, column: str, keys: Sequence[str]) -> set:
+        existing: set = set()
+        with self._lock:
+            for chunk in _chunked(list(dict.fromkeys(keys)), _QUERY_CHUNK):
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    row[0]
+                    for row in self._db.execute(
+                        f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})",
+                        tuple(chunk),
+                    )
+                )
+        return existing
+
+    def known_titles(self, titles: Sequence[str]) -> set:
+        return self._existing("titles", "title", titles)
+
+    def missing_ids(self, work_ids: Sequence[str]) -> List[str]:
+        existing = self._existing("works", "id", work_ids)
+        return [work_id for work_id in work_ids if work_id not in existing]
+
+    def put(
+        self,
+        works: Iterable[Dict[str, Any]] = (),
+        *,
+        titles: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Store ``works`` by id and ``titles`` (title -> work) in one transaction."""
+        work_rows: Dict[str, tuple] = {}
+        title_rows: List[tuple] = []
+        for work in works:
+            work_id = work.get("id")
+            if isinstance(work_id, str):
+                work_rows[work_id] = (work_id, *self._encode(work))
+        for title, work in (titles or {}).items():
+            work_id = work.get("id")
+            if not isinstance(work_id, str):
+                work_id = f"title:{title}"
+            work_rows.setdefault(work_id, (work_id, *self._encode(work)))
+            title_rows.append((title, work_id))
+        if not work_rows and not title_rows:
+            return
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO works (id, codec, payload) VALUES (?, ?, ?)",
+                        list(work_rows.values()),
+                    )
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO titles (title, work_id) VALUES (?, ?)",
+                        title_rows,
+                    )
+            except sqlite3.Error as exc:
+                print(f"Unable to persist OpenAlex works: {exc}")
+
+    def migrate_json(
+        self,
+        path: Path,
+        *,
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ) -> int:
+        """Import the legacy ``openalex_cache.json`` once; returns the number of works imported.
+
+        ``transform`` is applied to every work before it is stored.
+        """
+        with self._lock:
+            done = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+        if done or not path.exists():
+            return 0
+        try:
+            with path.open("r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"Skipping OpenAlex JSON cache migration: {exc}")
+            return 0
+        if not isinstance(data, dict):
+            data = {}
+
+        by_id = data.get("works_by_id") if isinstance(data.get("works_by_id"), dict) else {}
+        by_title = data.get("works_by_title") if isinstance(data.get("works_by_title"), dict) else {}
+        by_title = {title: work for title, work in by_title.items() if isinstance(work, dict) and work}
+        works = [work for work in by_id.values() if isinstance(work, dict)]
+        if transform is not None:
+            works = [transform(work) for work in works]
+            by_title = {title: transform(work) for title, work in by_title.items()}
+        self.put(works, titles=by_title)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (str(path),),
+            )
+        return len(set(by_id) | {work.get("id") for work in by_title.values()})
+
+
+class SharedWorkCache:
+    """Process-wide, thread-safe LRU of decoded works in front of an :class:`OpenAlexStore`.
+
+    All Streamlit sessions share one instance. :meth:`locked` gives a per-key lock
+    so concurrent sessions missing the same title or id make a single request.
+    """
+
+    def __init__(self, store: OpenAlexStore, max_entries: int = WORK_CACHE_MAX_ENTRIES):
+        self.store = store
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], List[Any]] = {}
+
+    def _remember(self, key: Tuple[str, str], work: Dict[str, Any]) -> None:
+        self._entries[key] = work
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            work = self._entries.get(key)
+            if work is not None:
+                self._entries.move_to_end(key)
+            return work
+
+    def get_by_title(self, title: str) -> Optional[Dict[str, Any]]:
+        key = ("title", title)
+        work = self._cached(key)
+        if work is None:
+            work = self.store.get_by_title(title)
+            if work is not None:
+                with self._lock:
+                    self._remember(key, work)
+        return work
+
+    def get_many_by_id(self, work_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for work_id in work_ids:
+                work = self._entries.get(("id", work_id))
+                if work is not None:
+                    self._entries.move_to_end(("id", work_id))
+                    found[work_id] = work
+        missing = [work_id for work_id in work_ids if work_id not in found]
+        if missing:
+            loaded = self.store.get_many_by_id(missing)
+            with self._lock:
+                for work_id, work in loaded.items():
+                    self._remember(("id", work_id), work)
+            found.update(loaded)
+        return found
+
+    def known_titles(self, titles: Sequence[str]) -> set:
+        return self.store.known_titles(titles)
+
+    def missing_ids(self, work_ids: Sequence[str]) -> List[str]:
+        with self._lock:
+            cached = {work_id for work_id in work_ids if ("id", work_id) in self._entries}
+        return self.store.missing_ids([work_id for work_id in work_ids if work_id not in cached])
+
+    def put(
+        self,
+        works: Iterable[Dict[str, Any]] = (),
+        *,
+        titles: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        works = list(works)
+        self.store.put(works, titles=titles)
+        with self._lock:
+            for work in works:
+                if isinstance(work.get("id"), str):
+                    self._remember(("id", work["id"]), work)
+            for title, work in (titles or {}).items():
+                self._remember(("title", title), work)
+
+    @contextmanager
+    def locked(self, *keys: Tuple[str, str]) -> Iterator[None]:
+        """Hold the locks for ``keys``; they are taken in sorted order to avoid deadlocks."""
+        ordered = sorted(set(keys))
+        with self._lock:
+            entries = []
+            for key in ordered:
+                entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+                entry[1] += 1
+                entries.append(entry)
+        acquired = []
+        try:
+            for entry in entries:
+                entry[0].acquire()
+                acquired.append(entry[0])
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            with self._lock:
+                for key, entry in zip(ordered, entries):
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        self._key_locks.pop(key, None)
@@ -1,23 +1,38 @@
-import json
 import re
-import time
-from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import streamlit as st
 from pyalex import Works, invert_abstract
+from pyalex import config as pyalex_config
 
-from utils.config import PUBLICATIONS_PATH
+from utils.config import OPENALEX_JSON_CACHE_PATH, OPENALEX_STORE_PATH
+from utils.openalex_store import OpenAlexStore, SharedWorkCache
+from utils.request_scheduler import OPENALEX_HOST, SCHEDULER
 
 
-CACHE_FILE = PUBLICATIONS_PATH.resolve().parent / "openalex_cache.json"
-CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
 BATCH_SIZE = 50
-FETCH_DELAY_SECONDS = 0.25
 
-
-def _empty_cache() -> Dict[str, Dict[str, Any]]:
-    return {"works_by_title": {}, "works_by_id": {}}
+OPENALEX_WORKS_URL = f"https://{OPENALEX_HOST}/works"
+OPENALEX_MAX_WORKERS = 4
+OPENALEX_TIMEOUT_SECONDS = 30
+
+# Root-level fields requested with ``select=`` and kept in the cache. Anything
+# else needs a full record from ``fetch_full_work``.
+SLIM_WORK_FIELDS = (
+    "id",
+    "doi",
+    "title",
+    "display_name",
+    "publication_year",
+    "ids",
+    "authorships",
+    "abstract_inverted_index",
+    "referenced_works",
+    "primary_location",
+    "best_oa_location",
+)
+_SLIM_LOCATION_FIELDS = ("landing_page_url", "pdf_url")
 
 
 def _serialize(value: Any) -> Any:
@@ -30,45 +45,36 @@ def _serialize(value: Any) -> Any:
     return value
 
 
-def _load_cache_from_disk() -> Dict[str, Dict[str, Any]]:
-    if not CACHE_FILE.exists():
-        return _empty_cache()
-    try:
-        with CACHE_FILE.open("r", encoding="utf-8") as cache_file:
-            data = json.load(cache_file)
-    except (OSError, json.JSONDecodeError):
-        return _empty_cache()
-    if not isinstance(data, dict):
-        return _empty_cache()
-    for key in ("works_by_title", "works_by_id"):
-        if key not in data or not isinstance(data[key], dict):
-            data[key] = {}
-    return data  # type: ignore[return-value]
-
-
-def _persist_cache_to_disk(cache: Dict[str, Dict[str, Any]]) -> None:
-    try:
-        with CACHE_FILE.open("w", encoding="utf-8") as cache_file:
-            json.dump(_serialize(cache), cache_file, ensure_ascii=False, indent=2)
-    except OSError as exc:
-        st.warning(f"Unable to persist OpenAlex cache: {exc}")
-
-
-def get_cache() -> Dict[str, Dict[str, Any]]:
-    cache = st.session_state.get("openalex_cache_store")
-    if cache is None:
-        cache = _load_cache_from_disk()
-        st.session_state["openalex_cache_store"] = cache
-    return cache
-
-
 def _chunked(items: Sequence[str], size: int) -> Iterable[Sequence[str]]:
     for start in range(0, len(items), size):
         yield items[start : start + size]
 
 
+def slim_work(work: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a work onto ``SLIM_WORK_FIELDS`` and drop unused nested detail."""
+    slim = {key: work[key] for key in SLIM_WORK_FIELDS if key in work}
+    authorships = slim.get("authorships")
+    if isinstance(authorships, list):
+        slim["authorships"] = [
+            {"author": {"display_name": (entry.get("author") or {}).get("display_name")}}
+            for entry in authorships
+            if isinstance(entry, dict)
+        ]
+    for key in ("primary_location", "best_oa_location"):
+        location = slim.get(key)
+        if isinstance(location, dict):
+            slim[key] = {field: location.get(field) for field in _SLIM_LOCATION_FIELDS}
+    return slim
+
+
 def _normalize_work(raw_work: Dict[str, Any]) -> Dict[str, Any]:
-    return _serialize(dict(raw_work))
+    return slim_work(_serialize(dict(raw_work)))
+
+
+STORE = OpenAlexStore(OPENALEX_STORE_PATH)
+STORE.migrate_json(OPENALEX_JSON_CACHE_PATH, transform=slim_work)
+# Shared by every Streamlit session in this process.
+WORK_CACHE = SharedWorkCache(STORE)
 
 
 def _title_variants(original: str) -> List[str]:
@@ -86,38 +92,40 @@ def _title_variants(original: str) -> List[str]:
     return variants
 
 
-def fetch_work_by_title(
-    title: str, *, show_status: bool = True
-) -> Optional[Dict[str, Any]]:
-    cache = get_cache()
-    cached = cache["works_by_title"].get(title)
-    if cached:
-        return cached
-
+def _search_work_by_title(title: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
     exception_messages: List[str] = []
-    selected_variant: Optional[str] = None
-    results = None
-
     for variant in _title_variants(title):
         query = f'"{variant}"'
         try:
-            candidate = Works().search(query).get()
+            candidate = SCHEDULER.call(
+                OPENALEX_HOST,
+                lambda: Works().search(query).select(list(SLIM_WORK_FIELDS)).get(),
+            )
         except Exception as exc:  # noqa: BLE001
             exception_messages.append(str(exc))
             continue
         if candidate:
-            results = candidate
-            selected_variant = variant
-            break
-        time.sleep(FETCH_DELAY_SECONDS)
-
-    if results:
-        work = _normalize_work(results[0])
-        cache["works_by_title"][title] = work
-        work_id = work.get("id")
-        if isinstance(work_id, str):
-            cache["works_by_id"][work_id] = work
-        _persist_cache_to_disk(cache)
+            work = _normalize_work(candidate[0])
+            WORK_CACHE.put(titles={title: work})
+            return work, exception_messages
+    return None, exception_messages
+
+
+def fetch_work_by_title(
+    title: str, *, show_status: bool = True
+) -> Optional[Dict[str, Any]]:
+    cached = WORK_CACHE.get_by_title(title)
+    if cached:
+        return cached
+
+    # Sessions asking for the same title wait here and reuse the first result.
+    with WORK_CACHE.locked(("title", title)):
+        cached = WORK_CACHE.get_by_title(title)
+        if cached:
+            return cached
+        work, exception_messages = _search_work_by_title(title)
+
+    if work:
         return work
 
     if show_status and exception_messages:
@@ -134,36 +142,159 @@ def fetch_work_by_title(
     return None
 
 
-def fetch_referenced_works(reference_ids: Sequence[str]) -> List[Dict[str, Any]]:
-    cache = get_cache()
-    cleaned_ids = [rid for rid in reference_ids if isinstance(rid, str) and rid]
+def _fetch_works_chunk(work_ids: Sequence[str], *, full: bool = False) -> List[Dict[str, Any]]:
+    params = {
+        "filter": "openalex:" + "|".join(rid.rsplit("/", 1)[-1] for rid in work_ids),
+        "per-page": len(work_ids),
+    }
+    if not full:
+        params["select"] = ",".join(SLIM_WORK_FIELDS)
+    if pyalex_config.email:
+        params["mailto"] = pyalex_config.email
+
+    response = SCHEDULER.get(OPENALEX_WORKS_URL, params=params, timeout=OPENALEX_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.json().get("results") or []
+
+
+def fetch_full_work(work_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch the complete OpenAlex record for ``work_id``; it is not cached."""
+    try:
+        works = _fetch_works_chunk([work_id], full=True)
+    except Exception as exc:  # noqa: BLE001
+        print(f"OpenAlex lookup failed for '{work_id}': {exc}")
+        return None
+    return _serialize(dict(works[0])) if works else None
+
+
+def _fetch_missing_works(work_ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch ``work_ids`` into the cache while holding their per-key locks."""
+    with WORK_CACHE.locked(*(("id", rid) for rid in work_ids)):
+        # Another session may have fetched some of them while we waited.
+        landed = WORK_CACHE.get_many_by_id(work_ids)
+        missing_ids = [rid for rid in work_ids if rid not in landed]
+        works = []
+        if missing_ids:
+            works = [_normalize_work(work) for work in _fetch_works_chunk(missing_ids)]
+            WORK_CACHE.put(works)
+    return list(landed.values()) + works
+
+
+def iter_referenced_works(reference_ids: Sequence[str]) -> Iterator[List[Dict[str, Any]]]:
+    """Yield referenced works in batches as they become available.
+
+    Cached works come first in one batch; missing ones are fetched in chunks of
+    ``BATCH_SIZE`` on a small thread pool and yielded in completion order. Each
+    chunk's cache locks are held only while it is fetched, never across a
+    ``yield``, so a slow or abandoned consumer does not block other sessions.
+    """
+    cleaned_ids = list(dict.fromkeys(rid for rid in reference_ids if isinstance(rid, str) and rid))
     if not cleaned_ids:
-        return []
+        return
+
+    cached = WORK_CACHE.get_many_by_id(cleaned_ids)
+    if cached:
+        yield list(cached.values())
+    missing_ids = [rid for rid in cleaned_ids if rid not in cached]
+    if not missing_ids:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=OPENALEX_MAX_WORKERS)
+    try:
+        futures = {
+            executor.submit(_fetch_missing_works, chunk): chunk
+            for chunk in _chunked(missing_ids, BATCH_SIZE)
+        }
+        for future in as_completed(futures):
+            try:
+                works = future.result()
+            except Exception as exc:  # noqa: BLE001
+                st.warning(
+                    f"Skipping {len(futures[future])} referenced works due to an API error: {exc}"
+                )
+                continue
+            if works:
+                yield works
+    finally:
+        # Chunks not started yet are dropped when the consumer stops early.
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    missing_ids = [rid for rid in cleaned_ids if rid not in cache["works_by_id"]]
-    for chunk in _chunked(missing_ids, BATCH_SIZE):
+
+def fetch_referenced_works(reference_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    works: Dict[str, Dict[str, Any]] = {}
+    for batch in iter_referenced_works(reference_ids):
+        for work in batch:
+            if isinstance(work.get("id"), str):
+                works[work["id"]] = work
+    return [works[rid] for rid in reference_ids if rid in works]
+
+
+_PMCID_PATTERN = re.compile(r"(?:PMC)?(\d+)/?$", re.IGNORECASE)
+
+
+def extract_pmcid(value: Any) -> Optional[str]:
+    """Return the numeric part of a PMC id or PMC article URL, e.g. ``"4136787"``."""
+    if not isinstance(value, str):
+        return None
+    match = _PMCID_PATTERN.search(value.strip())
+    return match.group(1) if match else None
+
+
+def prefetch_works(
+    publications: Sequence[Tuple[str, Any]],
+    *,
+    batch_size: int = BATCH_SIZE,
+    title_fallback: bool = True,
+) -> Dict[str, int]:
+    """Resolve ``(title, PMC link)`` pairs into the cache, ``batch_size`` works per request.
+
+    Works are looked up with ``ids.pmcid`` OR-filters; only titles without a PMC
+    id, or whose id OpenAlex does not know, go through the slow title search.
+    Returns counts of ``cached``, ``by_pmcid``, ``by_title`` and ``missing`` titles.
+    """
+    stats = dict.fromkeys(("cached", "by_pmcid", "by_title", "missing"), 0)
+    known = WORK_CACHE.known_titles([title for title, _ in publications])
+
+    titles_by_pmcid: Dict[str, List[str]] = {}
+    leftovers: List[str] = []
+    for title, link in publications:
+        if title in known:
+            stats["cached"] += 1
+            continue
+        pmcid = extract_pmcid(link)
+        if pmcid is None:
+            leftovers.append(title)
+        else:
+            titles_by_pmcid.setdefault(pmcid, []).append(title)
+
+    pmcids = list(titles_by_pmcid)
+    for chunk in _chunked(pmcids, batch_size):
         try:
-            works = Works()[list(chunk)]
-        except Exception as exc:  # noqa: BLE001
-            st.warning(
-                f"Skipping {len(chunk)} referenced works due to an API error: {exc}"
+            works = SCHEDULER.call(
+                OPENALEX_HOST,
+                lambda: Works()
+                .filter(ids={"pmcid": "|".join(chunk)})
+                .select(list(SLIM_WORK_FIELDS))
+                .get(per_page=len(chunk)),
             )
-            continue
-        for work in works:
-            normalized = _normalize_work(work)
-            work_id = normalized.get("id")
-            if isinstance(work_id, str):
-                cache["works_by_id"][work_id] = normalized
-        time.sleep(FETCH_DELAY_SECONDS)
-    if missing_ids:
-        _persist_cache_to_disk(cache)
-
-    ordered = []
-    for rid in cleaned_ids:
-        cached = cache["works_by_id"].get(rid)
-        if cached:
-            ordered.append(cached)
-    return ordered
+        except Exception as exc:  # noqa: BLE001
+            print(f"OpenAlex PMCID batch of {len(chunk)} failed, retrying by title: {exc}")
+            works = []
+        resolved: Dict[str, Dict[str, Any]] = {}
+        for raw_work in works:
+            work = _normalize_work(raw_work)
+            pmcid = extract_pmcid((work.get("ids") or {}).get("pmcid"))
+            for title in titles_by_pmcid.pop(pmcid, []):
+                resolved[title] = work
+        WORK_CACHE.put(titles=resolved)
+        stats["by_pmcid"] += len(resolved)
+
+    for titles in titles_by_pmcid.values():
+        leftovers.extend(titles)
+    for title in leftovers:
+        work = fetch_work_by_title(title, show_status=False) if title_fallback else None
+        stats["by_title" if work else "missing"] += 1
+    return stats
 
 
 def _normalize_pmc_url(url: Any) -> str:
@@ -258,11 +389,15 @@ def compose_work_text(work: Dict[str, Any]) -> str:
     return ". ".join(segment for segment in parts if segment)
 
 
+def get_cached_work(title: str) -> Optional[Dict[str, Any]]:
+    """Return the cached work for ``title`` without querying OpenAlex."""
+    return WORK_CACHE.get_by_title(title) or None
+
+
 def iterate_cached_works(titles: Sequence[str]) -> List[Dict[str, Any]]:
-    cache = get_cache()
     works: List[Dict[str, Any]] = []
     for title in titles:
-        work = cache["works_by_title"].get(title)
+        work = WORK_CACHE.get_by_title(title)
         if work:
             works.append(work)
     return works
@@ -2,24 +2,44 @@
 
 from __future__ import annotations
 
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import requests
 import streamlit as st
 from openai import OpenAI
 
+from utils.answer_cache import ANSWER_CACHE, CachedAnswer
+from utils.chunk_index import CHUNK_INDEX, chunk_index_key
+from utils.config import PASSAGE_INDEX_DIR
+from utils.passage_index import PassageIndex, index_version
+from utils.pdf_cache import PDF_CACHE, PdfCache
+from utils.pdf_text_store import PDF_TEXT_STORE, extract_pdf_text
+from utils.query_cache import embed_queries
+from utils.request_scheduler import OPENAI_HOST, SCHEDULER, estimate_tokens
+
 CHAT_MODEL = "gpt-4o-mini"
 EMBED_MODEL = "text-embedding-3-small"
 
 CHUNK_SIZE = 1200
 CHUNK_OVERLAP = 200
-MAX_CHUNKS = 120
 RETRIEVAL_TOP_K = 4
+CORPUS_RETRIEVAL_TOP_K = 8
+# Chunks per embeddings request are bounded by an estimated token budget.
+EMBED_BATCH_TOKENS = 8_000
+EMBED_MAX_WORKERS = 4
+# Attempts per batch within one build; a failed build resumes on the next question.
+EMBED_BATCH_MAX_ATTEMPTS = 3
 
 PDF_TEXT_MAX_BYTES = 15 * 1024 * 1024  # 15 MB limit for text extraction
+PDF_DOWNLOAD_MAX_BYTES = 50 * 1024 * 1024  # 50 MB limit for the inline viewer
+PDF_DOWNLOAD_CHUNK_BYTES = 256 * 1024
+PDF_REVALIDATE_SECONDS = 24 * 60 * 60  # cached PDFs are trusted for a day
 
 
 @st.cache_resource(show_spinner=False)
@@ -28,7 +48,8 @@ def get_openai_client() -> Optional[OpenAI]:
     api_key = st.secrets.get("OPENAI_API_KEY")
     if not api_key:
         return None
-    return OpenAI(api_key=api_key)
+    # SCHEDULER owns retries; SDK retries would multiply them.
+    return OpenAI(api_key=api_key, max_retries=0)
 
 
 def truncate_for_context(text: Optional[str], limit: int = 2500) -> str:
@@ -38,67 +59,144 @@ def truncate_for_context(text: Optional[str], limit: int = 2500) -> str:
     return text if len(text) <= limit else f"{text[: limit - 3]}..."
 
 
-@st.cache_data(show_spinner=False)
-def fetch_pdf_bytes(pdf_url: Optional[str]) -> Optional[bytes]:
-    """Download and cache the raw PDF bytes from a URL."""
+class PdfTooLargeError(Exception):
+    """Raised while streaming a PDF once it is known to exceed the byte limit."""
+
+
+def _iter_pdf_chunks(response: requests.Response, max_bytes: int) -> Iterator[bytes]:
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise PdfTooLargeError(int(declared))
+    received = 0
+    for chunk in response.iter_content(chunk_size=PDF_DOWNLOAD_CHUNK_BYTES):
+        received += len(chunk)
+        if received > max_bytes:
+            raise PdfTooLargeError(received)
+        yield chunk
+
+
+def download_pdf(
+    pdf_url: str, *, max_bytes: int = PDF_DOWNLOAD_MAX_BYTES, cache: Optional[PdfCache] = None
+) -> Path:
+    """Return the on-disk copy of a PDF, downloading it into the PDF cache on a miss.
+
+    The body is streamed straight to disk and the download is abandoned as soon
+    as ``Content-Length`` or the bytes received exceed ``max_bytes``. Cached
+    copies older than ``PDF_REVALIDATE_SECONDS`` are revalidated with
+    ``If-None-Match``/``If-Modified-Since`` and reused on ``304 Not Modified``.
+    ``cache`` defaults to the shared ``PDF_CACHE``.
+
+    Raises :class:`PdfTooLargeError`, ``requests.RequestException`` or ``OSError``.
+    """
+    cache = cache or PDF_CACHE
+    cached = cache.lookup(pdf_url)
+    if cached is not None and time.time() - cached.checked_at < PDF_REVALIDATE_SECONDS:
+        return cached.path
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        response = SCHEDULER.get(pdf_url, headers=headers, stream=True, timeout=20)
+    except requests.RequestException:
+        if cached is not None:
+            return cached.path
+        raise
+
+    with response:
+        if response.status_code == 304 and cached is not None:
+            cache.mark_checked(pdf_url)
+            return cached.path
+        try:
+            response.raise_for_status()
+            return cache.store(
+                pdf_url,
+                _iter_pdf_chunks(response, max_bytes),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        except requests.RequestException:
+            if cached is not None:
+                return cached.path
+            raise
+
+
+def fetch_pdf_path(
+    pdf_url: Optional[str], *, max_bytes: int = PDF_DOWNLOAD_MAX_BYTES
+) -> Optional[Path]:
+    """Like :func:`download_pdf`, but reports failures in the UI and returns ``None``."""
     if not pdf_url:
         return None
-
     try:
-        response = requests.get(pdf_url, timeout=20)
-        response.raise_for_status()
+        return download_pdf(pdf_url, max_bytes=max_bytes)
+    except PdfTooLargeError:
+        st.warning(
+            f"PDF is larger than {max_bytes // (1024 * 1024)} MB – "
+            "skipping download to keep the app responsive."
+        )
     except requests.RequestException as exc:
         st.warning(f"Unable to download PDF: {exc}")
-        return None
+    except OSError as exc:
+        st.warning(f"Unable to cache PDF: {exc}")
+    return None
 
-    return response.content
 
-
-@st.cache_data(show_spinner=False)
 def load_pdf_text(pdf_url: Optional[str]) -> Optional[str]:
-    """Extract text from a PDF URL using cached bytes."""
-    raw_bytes = fetch_pdf_bytes(pdf_url)
-    if raw_bytes is None:
+    """Return the text of a PDF, preferring the text store filled by ``build_artifacts``.
+
+    On a miss the PDF is downloaded and parsed here, and the result is added to
+    the store for every other session.
+    """
+    if not pdf_url:
         return None
 
-    if len(raw_bytes) > PDF_TEXT_MAX_BYTES:
+    stored = PDF_TEXT_STORE.get_by_url(pdf_url)
+    if stored is not None:
+        return stored or None
+
+    pdf_path = fetch_pdf_path(pdf_url, max_bytes=PDF_TEXT_MAX_BYTES)
+    if pdf_path is None:
+        return None
+
+    if pdf_path.stat().st_size > PDF_TEXT_MAX_BYTES:
         st.warning(
             "PDF is larger than 15 MB – skipping automatic ingestion to keep the app responsive."
         )
         return None
 
-    try:
-        from pypdf import PdfReader
+    # The cache names blobs after their SHA-256 digest.
+    digest = pdf_path.stem
+    stored = PDF_TEXT_STORE.get(digest)
+    if stored is not None:
+        PDF_TEXT_STORE.link(pdf_url, digest)
+        return stored or None
 
-        reader = PdfReader(BytesIO(raw_bytes))
-        pages = [page.extract_text() or "" for page in reader.pages]
-        raw_text = "\n".join(pages)
+    try:
+        text = extract_pdf_text(str(pdf_path))
     except Exception as exc:  # noqa: BLE001
         st.warning(f"Unable to extract text from PDF: {exc}")
         return None
 
-    cleaned = re.sub(r"\s+", " ", raw_text).strip()
-    return cleaned or None
+    PDF_TEXT_STORE.put(pdf_url, digest, text)
+    return text
 
 
-def chunk_text(
+def iter_chunks(
     text: str,
     *,
     chunk_size: int = CHUNK_SIZE,
     overlap: int = CHUNK_OVERLAP,
-    max_chunks: int = MAX_CHUNKS,
-) -> Tuple[List[str], bool]:
-    """Split text into overlapping windows and report if truncation occurred."""
+) -> Iterator[str]:
+    """Yield overlapping windows over ``text``, preferring to break at spaces."""
     sanitized = re.sub(r"\s+", " ", text).strip()
-    if not sanitized:
-        return [], False
-
-    chunks: List[str] = []
     start = 0
     length = len(sanitized)
-    truncated = False
 
-    while start < length and len(chunks) < max_chunks:
+    while start < length:
         end = min(start + chunk_size, length)
         if end < length:
             soft_end = sanitized.rfind(" ", start + chunk_size // 2, end)
@@ -107,7 +205,7 @@ def chunk_text(
 
         chunk = sanitized[start:end].strip()
         if chunk:
-            chunks.append(chunk)
+            yield chunk
 
         if end >= length:
             break
@@ -117,10 +215,180 @@ def chunk_text(
             next_start = end
         start = next_start
 
-    if start < length and len(chunks) >= max_chunks:
-        truncated = True
 
-    return chunks, truncated
+def iter_token_batches(
+    chunks: Iterable[str], *, max_tokens: float = EMBED_BATCH_TOKENS
+) -> Iterator[List[str]]:
+    """Group ``chunks`` into embedding requests of at most ``max_tokens`` estimated tokens."""
+    batch: List[str] = []
+    batch_tokens = 0.0
+    for chunk in chunks:
+        tokens = estimate_tokens([chunk])
+        if batch and batch_tokens + tokens > max_tokens:
+            yield batch
+            batch, batch_tokens = [], 0.0
+        batch.append(chunk)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_chunks(client: OpenAI, chunks: List[str]) -> np.ndarray:
+    """Embed ``chunks`` into a float32 matrix of unit-length rows; API errors propagate."""
+    response = SCHEDULER.call(
+        OPENAI_HOST,
+        lambda: client.embeddings.create(model=EMBED_MODEL, input=chunks),
+        tokens=estimate_tokens(chunks),
+    )
+    matrix = np.asarray([datum.embedding for datum in response.data], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class PdfIndexBuild:
+    """Chunk embeddings for one paper, filled in batch by batch on a shared pool.
+
+    :meth:`snapshot` returns whatever has been embedded so far, so questions can
+    be answered from the first batches while the rest are still in flight. A
+    build that finishes without errors is saved to the shared chunk index. One
+    whose batches still fail after ``EMBED_BATCH_MAX_ATTEMPTS`` is ``failed``: it
+    keeps its embedded batches and :meth:`retry_failed` resubmits only the rest.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._batches: Dict[int, Tuple[List[str], np.ndarray]] = {}
+        self._failed: Dict[int, List[str]] = {}
+        self._submitted = 0
+        self._finished = 0
+        self._all_submitted = False
+        self._progress = threading.Event()
+        self._done = threading.Event()
+
+    def start(self, pdf_text: str, client: OpenAI, *, chunk_size: int, overlap: int) -> None:
+        chunks = iter_chunks(pdf_text, chunk_size=chunk_size, overlap=overlap)
+        for number, batch in enumerate(iter_token_batches(chunks)):
+            with self._lock:
+                self._submitted += 1
+            self._submit(number, batch, client)
+        with self._lock:
+            self._all_submitted = True
+        self._maybe_finish()
+
+    def retry_failed(self, client: OpenAI) -> bool:
+        """Resubmit the batches of a failed build; returns ``False`` if it had not failed."""
+        with self._lock:
+            if not self._done.is_set() or not self._failed:
+                return False
+            failed, self._failed = self._failed, {}
+            self.error = None
+            self._finished -= len(failed)
+            self._done.clear()
+        for number, batch in failed.items():
+            self._submit(number, batch, client)
+        return True
+
+    def _submit(self, number: int, batch: List[str], client: OpenAI, attempt: int = 1) -> None:
+        future = _EMBED_EXECUTOR.submit(embed_chunks, client, batch)
+        future.add_done_callback(
+            lambda future: self._batch_done(number, batch, client, attempt, future)
+        )
+
+    def _batch_done(
+        self, number: int, batch: List[str], client: OpenAI, attempt: int, future
+    ) -> None:
+        exc = future.exception()
+        if exc is not None and attempt < EMBED_BATCH_MAX_ATTEMPTS:
+            self._submit(number, batch, client, attempt + 1)
+            return
+        with self._lock:
+            if exc is None:
+                self._batches[number] = (batch, future.result())
+            else:
+                self._failed[number] = batch
+                if self.error is None:
+                    self.error = exc
+            self._finished += 1
+        self._progress.set()
+        self._maybe_finish()
+
+    def _maybe_finish(self) -> None:
+        with self._lock:
+            if not self._all_submitted or self._finished < self._submitted or self._done.is_set():
+                return
+            self._done.set()
+        self._progress.set()
+        if self.error is not None:
+            # Failed builds stay registered so the next question resumes them.
+            return
+        if self._batches:
+            CHUNK_INDEX.put(self.key, self.snapshot())
+        with _BUILDS_LOCK:
+            _BUILDS.pop(self.key, None)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def failed(self) -> bool:
+        with self._lock:
+            return self._done.is_set() and self.error is not None
+
+    def wait(self, timeout: Optional[float] = None, *, first_batch: bool = False) -> bool:
+        """Block until the build finishes, or only until one batch lands with ``first_batch``."""
+        return (self._progress if first_batch else self._done).wait(timeout)
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            parts = [self._batches[number] for number in sorted(self._batches)]
+            complete = self._done.is_set() and self.error is None
+            failed = self._done.is_set() and self.error is not None
+        if not parts:
+            return None
+        chunks = [chunk for batch, _ in parts for chunk in batch]
+        embeddings = np.concatenate([matrix for _, matrix in parts], axis=0)
+        return {
+            "key": self.key,
+            "chunks": chunks,
+            "embeddings": embeddings,
+            "truncated": not complete,
+            "failed": failed,
+        }
+
+
+_EMBED_EXECUTOR = ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS, thread_name_prefix="pdf-embed")
+_BUILDS: Dict[str, PdfIndexBuild] = {}
+_BUILDS_LOCK = threading.Lock()
+
+
+def start_pdf_index(
+    pdf_text: str,
+    client: OpenAI,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+) -> Tuple[str, Optional[PdfIndexBuild]]:
+    """Return the chunk index key and the running build, starting one if needed.
+
+    A build that failed earlier is resumed. The build is ``None`` when the index
+    is already stored.
+    """
+    key = chunk_index_key(pdf_text, chunk_size=chunk_size, overlap=overlap, model=EMBED_MODEL)
+    if CHUNK_INDEX.contains(key):
+        return key, None
+    with _BUILDS_LOCK:
+        build = _BUILDS.get(key)
+        started = build is None
+        if started:
+            build = _BUILDS[key] = PdfIndexBuild(key)
+    if started:
+        build.start(pdf_text, client, chunk_size=chunk_size, overlap=overlap)
+    else:
+        build.retry_failed(client)
+    return key, build
 
 
 def build_pdf_index(
@@ -129,29 +397,86 @@ def build_pdf_index(
     *,
     chunk_size: int = CHUNK_SIZE,
     overlap: int = CHUNK_OVERLAP,
-    max_chunks: int = MAX_CHUNKS,
 ) -> Optional[Dict[str, Any]]:
-    """Create embeddings over PDF chunks for semantic retrieval."""
-    chunks, truncated = chunk_text(
-        pdf_text,
-        chunk_size=chunk_size,
-        overlap=overlap,
-        max_chunks=max_chunks,
-    )
-    if not chunks:
-        return None
+    """Return the chunk index for ``pdf_text``, shared by all sessions.
+
+    Long papers are embedded in concurrent batches. If the index is not stored
+    yet, this returns as soon as the first batch is embedded; the result then has
+    ``truncated`` set and later calls pick up the remaining batches. If some
+    batches failed it also has ``failed`` set, and the next call retries them.
+    """
+    key, build = start_pdf_index(pdf_text, client, chunk_size=chunk_size, overlap=overlap)
+    if build is None:
+        return CHUNK_INDEX.get(key)
+    build.wait(first_batch=True)
+    index = build.snapshot()
+    if build.done and build.error is None:
+        return CHUNK_INDEX.get(key) or index
+    if index is None and build.error is not None:
+        st.warning(f"Unable to embed PDF chunks: {build.error}")
+    return index
+
+
+def top_passage_rows(
+    chunk_matrix: np.ndarray, query_matrix: np.ndarray, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best ``top_k`` chunk rows for each query row, best first, as ``(rows, scores)``.
+
+    Both matrices must have unit-length rows, so one matrix product gives the
+    cosine similarities of every query against every chunk.
+    """
+    scores = query_matrix @ chunk_matrix.T
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        # ``[:, -0:]`` would select every column.
+        empty = np.zeros((scores.shape[0], 0), dtype=np.int64)
+        return empty, empty.astype(scores.dtype)
+    if k < scores.shape[1]:
+        top = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def retrieve_passages_many(
+    queries: Sequence[str],
+    index: Dict[str, Any],
+    client: OpenAI,
+    *,
+    top_k: int = RETRIEVAL_TOP_K,
+) -> List[List[Dict[str, Any]]]:
+    """Return the top semantic matches for each query, scored in a single batch.
+
+    Useful for query expansion or multi-part questions.
+    """
+    chunks: List[str] = index.get("chunks") or []
+    embeddings = index.get("embeddings")
+    if not queries:
+        return []
+    if not chunks or embeddings is None or len(embeddings) == 0:
+        return [[] for _ in queries]
 
     try:
-        embedding_response = client.embeddings.create(
-            model=EMBED_MODEL,
-            input=chunks,
-        )
+        query_matrix = embed_queries(client, queries, model=EMBED_MODEL)
     except Exception as exc:  # noqa: BLE001
-        st.warning(f"Unable to embed PDF chunks: {exc}")
-        return None
-
-    embeddings = [datum.embedding for datum in embedding_response.data]
-    return {"chunks": chunks, "embeddings": embeddings, "truncated": truncated}
+        st.warning(f"Unable to embed question for retrieval: {exc}")
+        return [[] for _ in queries]
+
+    norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+    query_matrix = query_matrix / np.maximum(norms, 1e-12)
+    top_rows, top_scores = top_passage_rows(embeddings, query_matrix, top_k)
+
+    results: List[List[Dict[str, Any]]] = []
+    for rows, scores in zip(top_rows, top_scores):
+        passages: List[Dict[str, Any]] = []
+        for rank, (idx, score) in enumerate(zip(rows, scores), start=1):
+            if score <= 0:
+                continue
+            passages.append({"rank": rank, "score": float(score), "text": chunks[idx]})
+        results.append(passages)
+    return results
 
 
 def retrieve_passages(
@@ -162,40 +487,118 @@ def retrieve_passages(
     top_k: int = RETRIEVAL_TOP_K,
 ) -> List[Dict[str, Any]]:
     """Return the top semantic matches for a query from the PDF index."""
-    chunks: List[str] = index.get("chunks") or []
-    embeddings: List[List[float]] = index.get("embeddings") or []
-    if not chunks or not embeddings:
-        return []
+    return retrieve_passages_many([query], index, client, top_k=top_k)[0]
+
+
+def get_passage_index() -> Optional[PassageIndex]:
+    """Return the corpus-wide passage index built by ``build_artifacts``, if present.
+
+    A rebuild on disk is picked up on the next call.
+    """
+    return _load_passage_index(index_version(PASSAGE_INDEX_DIR))
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_passage_index(version: Optional[int]) -> Optional[PassageIndex]:
+    return PassageIndex.load(PASSAGE_INDEX_DIR)
+
+
+def retrieve_corpus_passages(
+    query: str,
+    index: PassageIndex,
+    client: OpenAI,
+    *,
+    top_k: int = CORPUS_RETRIEVAL_TOP_K,
+    resource_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Return the top passages across the corpus, or within ``resource_id`` if given.
 
+    Each passage carries the ``resource_id`` of the paper it came from.
+    """
     try:
-        query_embedding = client.embeddings.create(
-            model=EMBED_MODEL,
-            input=[query],
-        ).data[0].embedding
+        query_matrix = embed_queries(client, [query], model=index.model)
     except Exception as exc:  # noqa: BLE001
         st.warning(f"Unable to embed question for retrieval: {exc}")
         return []
 
-    chunk_matrix = np.array(embeddings)
-    query_vector = np.array(query_embedding)
-
-    chunk_norms = np.linalg.norm(chunk_matrix, axis=1)
-    query_norm = np.linalg.norm(query_vector)
-    denom = np.maximum(chunk_norms * query_norm, 1e-12)
-    similarities = (chunk_matrix @ query_vector) / denom
-
-    if similarities.size == 0:
+    norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+    query_matrix = query_matrix / np.maximum(norms, 1e-12)
+    rows, scores = index.search(query_matrix, top_k, resource_id=resource_id)[0]
+    if rows.size == 0:
         return []
 
-    top_indices = np.argsort(similarities)[-top_k:][::-1]
-    results: List[Dict[str, Any]] = []
-    for rank, idx in enumerate(top_indices, start=1):
-        score = float(similarities[idx])
+    passages: List[Dict[str, Any]] = []
+    for rank, (row, owner, score) in enumerate(
+        zip(rows, index.resource_of(rows), scores), start=1
+    ):
         if score <= 0:
             continue
-        results.append({"rank": rank, "score": score, "text": chunks[idx]})
+        passages.append(
+            {
+                "rank": rank,
+                "score": float(score),
+                "text": index.text(int(row)),
+                "resource_id": int(owner),
+            }
+        )
+    return passages
 
-    return results
+
+def _question_vector(question: str, client: OpenAI) -> Optional[np.ndarray]:
+    try:
+        return embed_queries(client, [question], model=EMBED_MODEL)[0]
+    except Exception:  # noqa: BLE001 - retrieval reports embedding failures
+        return None
+
+
+def lookup_cached_answer(
+    resource_id: int, question: str, index: Dict[str, Any], client: OpenAI
+) -> Optional[CachedAnswer]:
+    """Return an earlier answer to a near-identical question about this paper, if any.
+
+    Only complete indexes take part, so answers grounded in a partial index are
+    never replayed.
+    """
+    if index.get("truncated") or not index.get("key"):
+        return None
+    vector = _question_vector(question, client)
+    if vector is None:
+        return None
+    return ANSWER_CACHE.lookup(resource_id, index["key"], vector)
+
+
+def remember_answer(
+    resource_id: int,
+    question: str,
+    index: Dict[str, Any],
+    client: OpenAI,
+    answer: str,
+    passages: List[Dict[str, Any]],
+) -> None:
+    if index.get("truncated") or not index.get("key"):
+        return
+    vector = _question_vector(question, client)
+    if vector is not None:
+        ANSWER_CACHE.store(resource_id, index["key"], question, vector, answer, passages)
+
+
+def answer_cache_summary() -> Optional[str]:
+    """One-line summary of ``ANSWER_CACHE.stats()``, or ``None`` before the first lookup."""
+    stats = ANSWER_CACHE.stats()
+    lookups = stats["hits"] + stats["misses"]
+    if not lookups:
+        return None
+    return (
+        f"Answer cache: {stats['hits']:.0f}/{lookups:.0f} questions answered from cache "
+        f"({stats['hit_rate']:.0%}), {stats['stored']:.0f} answers stored, "
+        f"{stats['expired'] + stats['invalidated']:.0f} expired or invalidated."
+    )
+
+
+def replay_answer(answer: str) -> Iterator[str]:
+    """Yield a cached answer in word-sized pieces so it renders like a live stream."""
+    for piece in re.findall(r"\S+\s*|\s+", answer):
+        yield piece
 
 
 def generate_chat_response(messages: List[Dict[str, str]]) -> Optional[str]:
@@ -206,10 +609,14 @@ def generate_chat_response(messages: List[Dict[str, str]]) -> Optional[str]:
         return None
 
     try:
-        completion = client.chat.completions.create(
-            model=CHAT_MODEL,
-            temperature=0.2,
-            messages=messages,
+        completion = SCHEDULER.call(
+            OPENAI_HOST,
+            lambda: client.chat.completions.create(
+                model=CHAT_MODEL,
+                temperature=0.2,
+                messages=messages,
+            ),
+            tokens=estimate_tokens(message.get("content") for message in messages),
         )
     except Exception as exc:  # noqa: BLE001
         st.error(f"Chatbot error: {exc}")
@@ -226,11 +633,15 @@ def stream_chat_response(messages: List[Dict[str, str]]):
         return
 
     try:
-        stream = client.chat.completions.create(
-            model=CHAT_MODEL,
-            temperature=0.2,
-            messages=messages,
-            stream=True,
+        stream = SCHEDULER.call(
+            OPENAI_HOST,
+            lambda: client.chat.completions.create(
+                model=CHAT_MODEL,
+                temperature=0.2,
+                messages=messages,
+                stream=True,
+            ),
+            tokens=estimate_tokens(message.get("content") for message in messages),
         )
     except Exception as exc:  # noqa: BLE001
         st.error(f"Chatbot error: {exc}")
@@ -240,16 +651,3 @@ def stream_chat_response(messages: List[Dict[str, str]]):
         chunk = part.choices[0].delta.content
         if chunk:
             yield chunk
-
-
-def approx_indexed_character_count(
-    *,
-    chunk_size: int = CHUNK_SIZE,
-    overlap: int = CHUNK_OVERLAP,
-    max_chunks: int = MAX_CHUNKS,
-) -> int:
-    """Estimate the number of characters retained in the retrieval index."""
-    effective = chunk_size - overlap if overlap and overlap < chunk_size else chunk_size
-    if effective <= 0:
-        effective = chunk_size
-    return max_chunks * effective
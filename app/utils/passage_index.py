@@ -0,0 +1,257 @@
+"""Corpus-wide passage index over extracted PDF text, for cross-paper Q&A.
+
+Rows are PDF chunks grouped by paper: the passages of ``resource_ids[i]`` are
+rows ``row_offsets[i]:row_offsets[i + 1]``. Embeddings are unit-length float32
+rows in a raw file that is memory-mapped on load, and chunk texts are UTF-8
+slices of one blob. Corpus-wide queries go through an IVF index so they stay
+in the tens of milliseconds at millions of rows; queries scoped to one paper
+score that paper's row range exactly.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.ann_index import DEFAULT_NPROBE, IVFIndex, exact_top_k
+
+INDEX_FORMAT_VERSION = 1
+
+# Below this many rows an exact scan is as fast as probing the IVF lists.
+EXACT_SEARCH_MAX_ROWS = 50_000
+
+_META_FILE = "meta.json"
+_EMBEDDINGS_FILE = "embeddings.f32"
+_TEXTS_FILE = "texts.bin"
+_ARRAYS_FILE = "layout.npz"
+_ANN_FILE = "ivf.npz"
+
+
+def index_version(directory: Path) -> Optional[int]:
+    """Modification time of the index metadata; changes whenever the index is rebuilt."""
+    try:
+        return (directory / _META_FILE).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _replace_directory(source: Path, target: Path) -> None:
+    """Move ``source`` to ``target``; a previous ``target`` is removed once replaced.
+
+    Files of the old index stay readable through existing memory maps after removal.
+    """
+    retired = None
+    if target.exists():
+        retired = Path(tempfile.mkdtemp(dir=target.parent, prefix=f"{target.name}_old_"))
+        os.replace(target, retired / target.name)
+    os.replace(source, target)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+class PassageIndex:
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        resource_ids: np.ndarray,
+        row_offsets: np.ndarray,
+        text_offsets: np.ndarray,
+        texts: np.ndarray,
+        *,
+        model: str,
+        built_at: float,
+        ann: Optional[IVFIndex] = None,
+    ):
+        self.embeddings = embeddings
+        self.resource_ids = np.asarray(resource_ids, dtype=np.int64)
+        self.row_offsets = np.asarray(row_offsets, dtype=np.int64)
+        self.text_offsets = np.asarray(text_offsets, dtype=np.int64)
+        self.texts = texts
+        self.model = model
+        self.built_at = built_at
+        self.ann = ann
+        self._paper_rows = {
+            int(resource_id): position for position, resource_id in enumerate(self.resource_ids)
+        }
+
+    @property
+    def passage_count(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    @property
+    def paper_count(self) -> int:
+        return int(self.resource_ids.shape[0])
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever the index is rebuilt; lets caches keyed on results expire."""
+        return f"{self.model}:{self.passage_count}:{self.built_at:.6f}"
+
+    def rows_for(self, resource_id: int) -> Tuple[int, int]:
+        position = self._paper_rows.get(int(resource_id))
+        if position is None:
+            return 0, 0
+        return int(self.row_offsets[position]), int(self.row_offsets[position + 1])
+
+    def resource_of(self, rows: np.ndarray) -> np.ndarray:
+        positions = np.searchsorted(self.row_offsets, rows, side="right") - 1
+        return self.resource_ids[positions]
+
+    def text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self.texts[start:end]).decode("utf-8")
+
+    def search(
+        self,
+        query_matrix: np.ndarray,
+        k: int,
+        *,
+        resource_id: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return ``(rows, scores)`` of the top ``k`` passages for each unit-length query row."""
+        query_matrix = np.atleast_2d(np.asarray(query_matrix, dtype=np.float32))
+        if resource_id is not None:
+            start, end = self.rows_for(resource_id)
+            if end <= start:
+                empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+                return [empty for _ in query_matrix]
+            block = np.asarray(self.embeddings[start:end], dtype=np.float32)
+            results = []
+            for query in query_matrix:
+                rows = exact_top_k(block, query, k)
+                results.append((rows + start, block[rows] @ query))
+            return results
+
+        if self.ann is None or self.passage_count <= EXACT_SEARCH_MAX_ROWS:
+            results = []
+            for query in query_matrix:
+                rows = exact_top_k(self.embeddings, query, k)
+                scores = np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+                results.append((rows, scores))
+            return results
+        return [self.ann.search(self.embeddings, query, k, nprobe=nprobe) for query in query_matrix]
+
+    @classmethod
+    def write(
+        cls,
+        directory: Path,
+        papers: Iterable[Tuple[int, Sequence[str], np.ndarray]],
+        *,
+        model: str,
+        n_lists: Optional[int] = None,
+    ) -> Optional["PassageIndex"]:
+        """Stream ``(resource_id, chunks, unit embeddings)`` per paper to ``directory``.
+
+        The files are written to a sibling directory that then replaces
+        ``directory``, so running apps keep reading the memory-mapped files of
+        the index they loaded. Returns the loaded index, or ``None`` when no
+        paper had any passages.
+        """
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f"{directory.name}_"))
+        staging.chmod(0o755)
+        try:
+            written = cls._write_files(staging, papers, model=model, n_lists=n_lists)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if not written:
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        _replace_directory(staging, directory)
+        return cls.load(directory)
+
+    @staticmethod
+    def _write_files(
+        directory: Path,
+        papers: Iterable[Tuple[int, Sequence[str], np.ndarray]],
+        *,
+        model: str,
+        n_lists: Optional[int],
+    ) -> bool:
+        resource_ids: List[int] = []
+        row_offsets = [0]
+        text_offsets = [0]
+        dim = 0
+        with (directory / _EMBEDDINGS_FILE).open("wb") as vectors, (
+            directory / _TEXTS_FILE
+        ).open("wb") as texts:
+            for resource_id, chunks, embeddings in papers:
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+                if not len(chunks) or embeddings.shape[0] != len(chunks):
+                    continue
+                dim = dim or int(embeddings.shape[1])
+                vectors.write(embeddings.tobytes())
+                for chunk in chunks:
+                    encoded = chunk.encode("utf-8")
+                    texts.write(encoded)
+                    text_offsets.append(text_offsets[-1] + len(encoded))
+                resource_ids.append(resource_id)
+                row_offsets.append(row_offsets[-1] + len(chunks))
+
+        if not resource_ids:
+            return False
+        with (directory / _ARRAYS_FILE).open("wb") as handle:
+            np.savez(
+                handle,
+                resource_ids=np.asarray(resource_ids, dtype=np.int64),
+                row_offsets=np.asarray(row_offsets, dtype=np.int64),
+                text_offsets=np.asarray(text_offsets, dtype=np.int64),
+            )
+        meta = {
+            "version": INDEX_FORMAT_VERSION,
+            "model": model,
+            "dim": dim,
+            "rows": row_offsets[-1],
+            "built_at": time.time(),
+        }
+        embeddings = np.memmap(
+            directory / _EMBEDDINGS_FILE, dtype=np.float32, mode="r", shape=(meta["rows"], dim)
+        )
+        if meta["rows"] > EXACT_SEARCH_MAX_ROWS:
+            IVFIndex.build(embeddings, np.arange(meta["rows"]), n_lists=n_lists).save(
+                directory / _ANN_FILE
+            )
+        # The metadata goes last so a half-written index is never loaded.
+        (directory / _META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        return True
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["PassageIndex"]:
+        try:
+            meta = json.loads((directory / _META_FILE).read_text(encoding="utf-8"))
+            if meta.get("version") != INDEX_FORMAT_VERSION:
+                return None
+            rows, dim = int(meta["rows"]), int(meta["dim"])
+            embeddings = np.memmap(
+                directory / _EMBEDDINGS_FILE, dtype=np.float32, mode="r", shape=(rows, dim)
+            )
+            texts = np.memmap(directory / _TEXTS_FILE, dtype=np.uint8, mode="r")
+            with np.load(directory / _ARRAYS_FILE) as arrays:
+                resource_ids = arrays["resource_ids"]
+                row_offsets = arrays["row_offsets"]
+                text_offsets = arrays["text_offsets"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+        ann = IVFIndex.load(directory / _ANN_FILE)
+        if ann is not None and ann.row_ids.shape[0] != rows:
+            ann = None
+        return cls(
+            embeddings,
+            resource_ids,
+            row_offsets,
+            text_offsets,
+            texts,
+            model=meta["model"],
+            built_at=float(meta["built_at"]),
+            ann=ann,
+        )
@@ -0,0 +1,174 @@
+"""Content-addressed PDF cache on local disk with LRU eviction against a byte budget.
+
+Blobs live under ``blobs/<aa>/<sha256>.pdf``; an SQLite index maps source URLs
+to digests and tracks sizes and last access, so identical files downloaded
+from different URLs are stored once and memory use does not grow with the
+number of papers opened. The ``ETag`` and ``Last-Modified`` validators of each
+download are kept next to the URL so stale entries can be revalidated with a
+conditional request instead of a full download.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from utils.config import PDF_CACHE_DIR
+
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Blobs handed out this recently are not evicted: callers reopen the path later
+# (the PDF viewer, text extraction), so the cache may briefly exceed its budget.
+PDF_CACHE_GRACE_SECONDS = 10 * 60
+
+
+class CachedPdf(NamedTuple):
+    path: Path
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: float
+
+
+class PdfCache:
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = PDF_CACHE_MAX_BYTES,
+        grace_seconds: float = PDF_CACHE_GRACE_SECONDS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self._lock = threading.Lock()
+        directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(directory / "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " checked_at REAL NOT NULL DEFAULT 0);"
+        )
+        # Indexes created before validators were tracked lack these columns.
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(urls)")}
+        for column, ddl in (
+            ("etag", "etag TEXT"),
+            ("last_modified", "last_modified TEXT"),
+            ("checked_at", "checked_at REAL NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE urls ADD COLUMN {ddl}")
+        self._db.commit()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / f"{digest}.pdf"
+
+    def lookup(self, url: str) -> Optional[CachedPdf]:
+        """Return the cached entry for ``url`` and mark its file as recently used."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified, checked_at FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, checked_at = row
+            path = self._blob_path(digest)
+            if not path.exists():
+                # Removed behind our back; forget it so the caller downloads again.
+                with self._db:
+                    self._db.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                    self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                return None
+            with self._db:
+                self._db.execute(
+                    "UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest)
+                )
+            return CachedPdf(path, etag, last_modified, checked_at)
+
+    def mark_checked(self, url: str) -> None:
+        """Record that the server confirmed the cached copy of ``url`` is current."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE urls SET checked_at = ? WHERE url = ?", (time.time(), url))
+
+    def store(
+        self,
+        url: str,
+        chunks: Iterable[bytes],
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Path:
+        """Write ``chunks`` to disk while hashing them and index the result under ``url``.
+
+        If ``chunks`` raises, the partial file is removed and the index is untouched.
+        """
+        tmp_dir = self.directory / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile("wb", delete=False, dir=tmp_dir, suffix=".part") as handle:
+            try:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                handle.close()
+                os.unlink(handle.name)
+                raise
+
+        hex_digest = digest.hexdigest()
+        path = self._blob_path(hex_digest)
+        now = time.time()
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                os.unlink(handle.name)
+            else:
+                os.replace(handle.name, path)
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, size, last_access) VALUES (?, ?, ?)",
+                    (hex_digest, size, now),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO urls (url, digest, etag, last_modified, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, hex_digest, etag, last_modified, now),
+                )
+            self._evict(keep=hex_digest)
+        return path
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    def _evict(self, *, keep: str) -> None:
+        total = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT digest, size FROM blobs WHERE digest != ? AND last_access < ? "
+            "ORDER BY last_access",
+            (keep, time.time() - self.grace_seconds),
+        ).fetchall()
+        with self._db:
+            for digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    self._blob_path(digest).unlink()
+                except FileNotFoundError:
+                    pass
+                self._db.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                total -= size
+
+
+PDF_CACHE = PdfCache(PDF_CACHE_DIR)
@@ -0,0 +1,149 @@
+"""Compressed store of text extracted from PDFs, keyed by the PDF's SHA-256 digest.
+
+``scripts/build_artifacts.py`` fills it offline so the paper Q&A tab can read a
+paper's text without downloading or parsing the PDF. Source URLs map onto
+digests, so mirrors of the same file share one entry.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ModuleNotFoundError:  # pragma: no cover - zlib is used instead
+    zstandard = None
+
+from utils.config import PDF_TEXT_STORE_PATH
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def extract_pdf_text(path: str) -> Optional[str]:
+    """Text of the PDF at ``path`` with whitespace collapsed, or ``None`` if there is none.
+
+    Kept free of Streamlit so it can run in worker processes.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    raw_text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    return _WHITESPACE.sub(" ", raw_text).strip() or None
+
+
+class PdfTextStore:
+    """Texts are stored once per PDF digest; an empty text records a PDF without any."""
+
+    def __init__(self, path: Optional[Path]):
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=9) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self._db = self._open_db(path)
+
+    @staticmethod
+    def _open_db(path: Optional[Path]) -> sqlite3.Connection:
+        db = None
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(path), check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.Error as exc:
+                print(f"PDF text store running in memory only: {exc}")
+                db = None
+        if db is None:
+            db = sqlite3.connect(":memory:", check_same_thread=False)
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            "digest TEXT PRIMARY KEY, codec TEXT NOT NULL, payload BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "url TEXT PRIMARY KEY, digest TEXT NOT NULL);"
+        )
+        db.commit()
+        return db
+
+    def _encode(self, text: str) -> Tuple[str, bytes]:
+        payload = text.encode("utf-8")
+        if self._compressor is not None:
+            return "zstd", self._compressor.compress(payload)
+        return "zlib", zlib.compress(payload, 9)
+
+    def _decode(self, codec: str, payload: bytes) -> Optional[str]:
+        if codec == "zstd":
+            if self._decompressor is None:
+                return None
+            payload = self._decompressor.decompress(payload)
+        elif codec == "zlib":
+            payload = zlib.decompress(payload)
+        return payload.decode("utf-8")
+
+    def get(self, digest: str) -> Optional[str]:
+        """Stored text for ``digest``; ``""`` when the PDF had no text, ``None`` when unknown."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT codec, payload FROM texts WHERE digest = ?", (digest,)
+            ).fetchone()
+        return self._decode(*row) if row else None
+
+    def get_by_url(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT texts.codec, texts.payload FROM sources "
+                "JOIN texts ON texts.digest = sources.digest WHERE sources.url = ?",
+                (url,),
+            ).fetchone()
+        return self._decode(*row) if row else None
+
+    def known_urls(self, urls: Sequence[str]) -> set:
+        with self._lock:
+            known = {
+                row[0]
+                for row in self._db.execute(
+                    "SELECT sources.url FROM sources JOIN texts ON texts.digest = sources.digest"
+                )
+            }
+        return known.intersection(urls)
+
+    def put(self, url: str, digest: str, text: Optional[str]) -> None:
+        self.put_many([(url, digest, text)])
+
+    def put_many(self, entries: Sequence[Tuple[str, str, Optional[str]]]) -> None:
+        """Store ``(url, digest, text)`` entries in one transaction."""
+        texts: Dict[str, tuple] = {}
+        sources: List[tuple] = []
+        for url, digest, text in entries:
+            texts[digest] = (digest, *self._encode(text or ""))
+            sources.append((url, digest))
+        if not sources:
+            return
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO texts (digest, codec, payload) VALUES (?, ?, ?)",
+                        list(texts.values()),
+                    )
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO sources (url, digest) VALUES (?, ?)", sources
+                    )
+            except sqlite3.Error as exc:
+                print(f"Unable to persist PDF text: {exc}")
+
+    def link(self, url: str, digest: str) -> bool:
+        """Point ``url`` at an already stored digest; returns ``False`` if it is unknown."""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM texts WHERE digest = ?", (digest,)).fetchone() is None:
+                return False
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (url, digest) VALUES (?, ?)", (url, digest)
+                )
+        return True
+
+
+PDF_TEXT_STORE = PdfTextStore(PDF_TEXT_STORE_PATH)
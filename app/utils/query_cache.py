@@ -0,0 +1,153 @@
+"""Process-wide cache of query embeddings shared by search and paper Q&A."""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.config import QUERY_CACHE_PATH
+from utils.request_scheduler import OPENAI_HOST, SCHEDULER, estimate_tokens
+
+QUERY_CACHE_MAX_ENTRIES = 4096
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different queries share a key."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """In-memory LRU in front of an optional SQLite table of embeddings.
+
+    Entries are keyed by ``(model, normalized query)`` and stored as raw float32
+    vectors exactly as returned by the embeddings API.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = self._open_db(path)
+
+    @staticmethod
+    def _open_db(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            db.commit()
+        except sqlite3.Error as exc:
+            print(f"Query embedding cache running in memory only: {exc}")
+            return None
+        return db
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                return vector
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                    key,
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, vector)
+            return vector
+
+    def put(self, model: str, query: str, vector: np.ndarray) -> None:
+        key = (model, normalize_query(query))
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                    (*key, vector.tobytes()),
+                )
+                self._db.commit()
+            except sqlite3.Error as exc:
+                print(f"Unable to persist query embedding: {exc}")
+
+
+QUERY_CACHE = QueryEmbeddingCache(path=QUERY_CACHE_PATH)
+
+
+def embed_query(client, query: str, *, model: str) -> np.ndarray:
+    """Return the embedding for ``query``, calling the API only on a cache miss.
+
+    The normalized query is only the cache key; the API embeds the query as
+    written. API errors propagate so callers can keep their existing fallbacks.
+    """
+    cached = QUERY_CACHE.get(model, query)
+    if cached is not None:
+        return cached
+
+    text = query.strip()
+    response = SCHEDULER.call(
+        OPENAI_HOST,
+        lambda: client.embeddings.create(model=model, input=[text]),
+        tokens=estimate_tokens([text]),
+    )
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    QUERY_CACHE.put(model, query, vector)
+    return vector
+
+
+def embed_queries(client, queries: Sequence[str], *, model: str) -> np.ndarray:
+    """Embed several queries as rows of one matrix, sending all cache misses in one call."""
+    vectors: Dict[str, np.ndarray] = {}
+    # Normalized key -> first spelling of the query, which is what gets embedded.
+    missing: Dict[str, str] = {}
+    for query in queries:
+        key = normalize_query(query)
+        if key in vectors or key in missing:
+            continue
+        cached = QUERY_CACHE.get(model, query)
+        if cached is not None:
+            vectors[key] = cached
+        else:
+            missing[key] = query.strip()
+
+    if missing:
+        texts = list(missing.values())
+        response = SCHEDULER.call(
+            OPENAI_HOST,
+            lambda: client.embeddings.create(model=model, input=texts),
+            tokens=estimate_tokens(texts),
+        )
+        for key, datum in zip(missing, response.data):
+            vector = np.asarray(datum.embedding, dtype=np.float32)
+            QUERY_CACHE.put(model, key, vector)
+            vectors[key] = vector
+
+    return np.stack([vectors[normalize_query(query)] for query in queries])
@@ -0,0 +1,54 @@
+"""Thread-safe token buckets for pacing outbound API calls."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Refill ``rate`` tokens per second up to ``capacity``; ``acquire`` blocks until paid.
+
+    Requests larger than the bucket are clamped to its capacity so a single huge
+    call waits for a full bucket instead of blocking forever.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> "TokenBucket":
+        return cls(rate=amount / 60.0, capacity=amount)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens, sleeping as needed; returns the seconds waited."""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def backoff_delay(attempt: int, *, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given zero-based retry attempt."""
+    return random.uniform(0.0, min(cap, base * (2.0 ** attempt)))
@@ -0,0 +1,299 @@
+"""One scheduler for every outbound API call: per-host pacing, concurrency and retries.
+
+Each host gets a request token bucket, an optional tokens-per-minute bucket
+(for the OpenAI API), a cap on in-flight requests and a retry policy with
+jittered exponential backoff that prefers the server's ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlparse
+
+import openai
+import requests
+
+from utils.rate_limit import TokenBucket, backoff_delay
+
+T = TypeVar("T")
+
+OPENALEX_HOST = "api.openalex.org"
+PMC_HOST = "www.ncbi.nlm.nih.gov"
+OSDR_HOST = "osdr.nasa.gov"
+OPENAI_HOST = "api.openai.com"
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Failures without an HTTP status that are worth another attempt.
+TRANSPORT_ERRORS: Tuple[Type[BaseException], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    openai.APIConnectionError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class HostPolicy:
+    """Limits for one host. ``burst`` defaults to one second's worth of requests."""
+
+    def __init__(
+        self,
+        *,
+        requests_per_second: float,
+        burst: Optional[float] = None,
+        max_concurrency: int = 4,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+    ):
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else max(1.0, requests_per_second)
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+
+DEFAULT_POLICY = HostPolicy(requests_per_second=5, max_concurrency=4)
+DEFAULT_POLICIES: Dict[str, HostPolicy] = {
+    # OpenAlex asks polite clients to stay at or below 10 requests per second.
+    OPENALEX_HOST: HostPolicy(requests_per_second=10, max_concurrency=4),
+    # NCBI allows 3 requests per second without an API key.
+    PMC_HOST: HostPolicy(requests_per_second=3, max_concurrency=2),
+    OSDR_HOST: HostPolicy(requests_per_second=5, max_concurrency=4),
+    OPENAI_HOST: HostPolicy(
+        requests_per_second=3000 / 60,
+        max_concurrency=4,
+        tokens_per_minute=1_000_000,
+        max_retries=5,
+    ),
+}
+
+
+def estimate_tokens(texts: Iterable[str]) -> float:
+    """Rough token count (~4 characters per token) for tokens-per-minute budgets."""
+    return sum(len(text) for text in texts if text) / 4
+
+
+_COUNTERS = ("requests", "retries", "throttled", "failures", "wait_seconds")
+
+
+class _HostState:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.requests = TokenBucket(policy.requests_per_second, policy.burst)
+        self.tokens = (
+            TokenBucket.per_minute(policy.tokens_per_minute) if policy.tokens_per_minute else None
+        )
+        self.slots = threading.BoundedSemaphore(policy.max_concurrency)
+        self.counters: Dict[str, float] = dict.fromkeys(_COUNTERS, 0)
+        self.session: Optional[requests.Session] = None
+
+
+def _header_retry_after(headers: Any) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _error_details(exc: BaseException) -> Tuple[Optional[int], Optional[float]]:
+    """Status code and ``Retry-After`` of an HTTP-ish exception (requests, OpenAI)."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    return status, _header_retry_after(getattr(response, "headers", None))
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether ``exc`` is a transport error or an HTTP 429/5xx worth retrying."""
+    status, _ = _error_details(exc)
+    if status is not None:
+        return status in RETRY_STATUS_CODES
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+def _release_on_close(response: requests.Response, release: Callable[[], None]) -> None:
+    close = response.close
+
+    def close_and_release() -> None:
+        try:
+            close()
+        finally:
+            release()
+
+    response.close = close_and_release  # type: ignore[method-assign]
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        policies: Optional[Dict[str, HostPolicy]] = None,
+        default_policy: HostPolicy = DEFAULT_POLICY,
+    ):
+        self._policies = dict(policies or {})
+        self._default_policy = default_policy
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, policy: HostPolicy) -> None:
+        """Replace the policy for ``host``; counters start from zero again."""
+        with self._lock:
+            self._policies[host] = policy
+            self._hosts.pop(host, None)
+
+    def _host(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(self._policies.get(host, self._default_policy))
+                self._hosts[host] = state
+            return state
+
+    def _count(self, state: _HostState, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            state.counters[counter] += amount
+
+    @contextmanager
+    def slot(self, host: str, *, tokens: float = 0.0) -> Iterator[None]:
+        """Wait for a concurrency slot and the rate budget, then run one request."""
+        state = self._host(host)
+        started = time.monotonic()
+        with state.slots:
+            state.requests.acquire()
+            if tokens and state.tokens is not None:
+                state.tokens.acquire(tokens)
+            self._count(state, "wait_seconds", time.monotonic() - started)
+            self._count(state, "requests")
+            yield
+
+    def _retry_delay(
+        self,
+        state: _HostState,
+        attempt: int,
+        status: Optional[int],
+        retry_after: Optional[float],
+    ) -> float:
+        self._count(state, "retries")
+        if status == 429:
+            self._count(state, "throttled")
+        policy = state.policy
+        if retry_after is not None:
+            # A server asking for hours must not park a script thread that long.
+            return min(retry_after, policy.backoff_cap)
+        return backoff_delay(attempt, base=policy.backoff_base, cap=policy.backoff_cap)
+
+    def call(
+        self,
+        host: str,
+        func: Callable[[], T],
+        *,
+        tokens: float = 0.0,
+        retry_on: Optional[Tuple[Type[BaseException], ...]] = None,
+    ) -> T:
+        """Run ``func`` under ``host``'s limits, retrying transient failures.
+
+        By default only transport errors and HTTP 429/5xx responses are retried
+        (see ``is_transient``). ``retry_on`` widens that to every exception of
+        the given types, but errors carrying an HTTP status outside
+        ``RETRY_STATUS_CODES`` (e.g. 400 or 404) are still raised straight away.
+        """
+        state = self._host(host)
+        for attempt in range(state.policy.max_retries + 1):
+            try:
+                with self.slot(host, tokens=tokens):
+                    return func()
+            except Exception as exc:  # noqa: BLE001 - re-raised unless retryable
+                status, retry_after = _error_details(exc)
+                if retry_on is None:
+                    retryable = is_transient(exc)
+                else:
+                    retryable = isinstance(exc, retry_on) and (
+                        status is None or status in RETRY_STATUS_CODES
+                    )
+                if not retryable or attempt >= state.policy.max_retries:
+                    self._count(state, "failures")
+                    raise
+                time.sleep(self._retry_delay(state, attempt, status, retry_after))
+        raise AssertionError("unreachable")
+
+    def session(self, host: str) -> requests.Session:
+        """Keep-alive session for ``host`` with one pooled connection per concurrency slot."""
+        state = self._host(host)
+        with self._lock:
+            if state.session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=state.policy.max_concurrency
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                state.session = session
+            return state.session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send an HTTP request, retrying connection errors and 429/5xx responses.
+
+        The final response is returned as is; callers decide whether to
+        ``raise_for_status``. With ``stream=True`` the concurrency slot is held
+        until the response is closed, so callers must close it (``with response:``).
+        """
+        host = urlparse(url).hostname or ""
+        state = self._host(host)
+        session = self.session(host)
+        for attempt in range(state.policy.max_retries + 1):
+            last_attempt = attempt >= state.policy.max_retries
+            slot = ExitStack()
+            try:
+                slot.enter_context(self.slot(host))
+                response = session.request(method, url, **kwargs)
+            except requests.RequestException:
+                slot.close()
+                if last_attempt:
+                    self._count(state, "failures")
+                    raise
+                time.sleep(self._retry_delay(state, attempt, None, None))
+                continue
+            except BaseException:
+                slot.close()
+                raise
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                delay = self._retry_delay(
+                    state, attempt, response.status_code, _header_retry_after(response.headers)
+                )
+                response.close()
+                slot.close()
+                time.sleep(delay)
+                continue
+            if response.status_code >= 400:
+                self._count(state, "failures")
+            if kwargs.get("stream"):
+                _release_on_close(response, slot.close)
+            else:
+                slot.close()
+            return response
+        raise AssertionError("unreachable")
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {host: dict(state.counters) for host, state in self._hosts.items()}
+
+
+SCHEDULER = RequestScheduler(DEFAULT_POLICIES)
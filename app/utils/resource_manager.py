@@ -1,9 +1,13 @@
 import datetime
+import hashlib
+import math
 import os
-import tempfile
 import pickle
 import random
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, ContextManager
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union, ContextManager
 
 import numpy as np
 from contextlib import nullcontext
@@ -19,10 +23,29 @@ from openai import OpenAI
 # from pyalex import config as pyalex_config, invert_abstract
 from pyalex.api import invert_abstract
 
-from utils.config import PUBLICATIONS_PATH, EXPERIMENTS_PATH, RESOURCE_PATH
+from utils.ann_index import DEFAULT_NPROBE, IVFIndex
+from utils.config import (
+    PUBLICATIONS_PATH,
+    EXPERIMENTS_PATH,
+    RESOURCE_PATH,
+    SNAPSHOT_DIR,
+    ANN_INDEX_PATH,
+    LEXICAL_INDEX_PATH,
+    LINK_INDEX_PATH,
+)
+from utils.lexical_index import LexicalIndex, documents_hash
+from utils.link_index import LinkIndex, TitleMatcher
+from utils.resource_table import ResourceTable
+from utils.snapshot import read_snapshot, write_snapshot
+from utils.query_cache import embed_query
+from utils.request_scheduler import OPENAI_HOST, SCHEDULER, estimate_tokens
 from utils.openalex_utils import (
+    SLIM_WORK_FIELDS,
+    fetch_full_work,
     fetch_work_by_title,
-    fetch_referenced_works,
+    get_abstract_text,
+    get_cached_work,
+    iter_referenced_works,
     summarise_reference,
     resolve_best_link,
 )
@@ -30,15 +53,36 @@ from utils.openalex_utils import (
 EMBED_MODEL = "text-embedding-3-small"
 EMBED_BATCH_SIZE = 64
 EMBED_MAX_CHARS = 6000
+EMBED_MAX_WORKERS = 4
+# Write a snapshot after this many completed batches so an interrupted run resumes.
+EMBED_CHECKPOINT_EVERY = 20
+
+# Below this many embedded resources an exact scan is faster than probing the ANN index.
+ANN_MIN_ROWS = 50_000
 
 
 class PaperResource:
+    __slots__ = (
+        "resource_id",
+        "title",
+        "_data",
+        "_full_data",
+        "embedding",
+        "embedding_model",
+        "embedding_hash",
+    )
+
+    type = "Publication"
+    icon = "📘"
+
     def __init__(self, title: str):
+        self.resource_id: Optional[int] = None
         self.title = title
-        self.type = "Publication"
-        self.icon = "📘"
         self._data = None
-        self._experiments = []
+        self._full_data = None
+        self.embedding = None
+        self.embedding_model = None
+        self.embedding_hash = None
 
     @property
     def data(self) -> Optional[Dict[str, Any]]:
@@ -46,6 +90,22 @@ class PaperResource:
             self._data = fetch_work_by_title(self.title)
         return self._data
 
+    @property
+    def full_data(self) -> Optional[Dict[str, Any]]:
+        """Complete OpenAlex record; ``data`` only holds ``SLIM_WORK_FIELDS``."""
+        if self._full_data is None and self.data is not None:
+            work_id = self.data.get("id")
+            if isinstance(work_id, str):
+                self._full_data = fetch_full_work(work_id)
+        return self._full_data
+
+    @property
+    def cached_data(self) -> Optional[Dict[str, Any]]:
+        """Metadata already held locally; never triggers an OpenAlex request."""
+        if self._data is not None:
+            return self._data
+        return get_cached_work(self.title)
+
     @property
     def year(self):
         if self.data is not None:
@@ -75,43 +135,47 @@ class PaperResource:
 
         return abstract
 
-    @property
-    def referenced_work(self):
+    def iter_referenced_work(self) -> Iterator[List[str]]:
+        """Yield the full, year-sorted reference list each time another batch lands."""
         if self.data is None:
-            return None
+            return
         referenced_ids = self.data.get("referenced_works") or []
 
-        if referenced_ids:
-            referenced_works = fetch_referenced_works(tuple(referenced_ids))
-
-            if referenced_works:
-                reference_label_list = []
-                summaries = [summarise_reference(work) for work in referenced_works]
-
-                for idx, reference in enumerate(
-                    sorted(
-                        summaries,
-                        key=lambda item: item.get("publication_year") or 0,
-                        reverse=True,
-                    ),
-                    start=1,
-                ):
-                    title = reference.get("title") or reference.get("id") or "Untitled"
-                    link = reference.get("link") or reference.get("id")
-                    year = reference.get("publication_year")
-                    descriptor = f"{title}"
-                    if year:
-                        descriptor += f" ({year})"
-                    if link:
-                        label = reference.get("link_label")
-                        suffix = f" _(via {label})_" if label else ""
-                        reference_label = f"{idx}. [{descriptor}]({link}){suffix}"
-                    else:
-                        reference_label = f"{idx}. {descriptor}"
-
-                    reference_label_list.append(reference_label)
-            return reference_label_list
-        return None
+        summaries: List[Dict[str, Any]] = []
+        for referenced_works in iter_referenced_works(tuple(referenced_ids)):
+            summaries.extend(summarise_reference(work) for work in referenced_works)
+
+            reference_label_list = []
+            for idx, reference in enumerate(
+                sorted(
+                    summaries,
+                    key=lambda item: item.get("publication_year") or 0,
+                    reverse=True,
+                ),
+                start=1,
+            ):
+                title = reference.get("title") or reference.get("id") or "Untitled"
+                link = reference.get("link") or reference.get("id")
+                year = reference.get("publication_year")
+                descriptor = f"{title}"
+                if year:
+                    descriptor += f" ({year})"
+                if link:
+                    label = reference.get("link_label")
+                    suffix = f" _(via {label})_" if label else ""
+                    reference_label = f"{idx}. [{descriptor}]({link}){suffix}"
+                else:
+                    reference_label = f"{idx}. {descriptor}"
+
+                reference_label_list.append(reference_label)
+            yield reference_label_list
+
+    @property
+    def referenced_work(self):
+        reference_label_list = None
+        for reference_label_list in self.iter_referenced_work():
+            pass
+        return reference_label_list
 
     @property
     def paper_url(self) -> Optional[Tuple[str, str]]:
@@ -136,68 +200,110 @@ class PaperResource:
         return None
 
     def get_property(self, key: str, default=None):
-        if self.data is not None:
-            return self.data.get(key, default)
+        data = self.data if key in SLIM_WORK_FIELDS else self.full_data
+        if data is not None:
+            return data.get(key, default)
         return default
 
     @property
     def experiments(self) -> List["ExperimentResource"]:
-        return self._experiments
+        return _linked_resources(self.resource_id)
+
+
+def _release_year(timestamp: Any) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return str(datetime.datetime.utcfromtimestamp(timestamp).year)
 
 
 class ExperimentResource:
-    def __init__(self, osd_key: str, metadata: Dict[str, Any]):
+    """An OSDR study.
+
+    Fields shown in listings live in slots; the full OSDR metadata dict is only
+    kept in memory when given at construction; otherwise it is loaded on demand
+    through ``metadata_loader`` from the snapshot.
+    """
+
+    __slots__ = (
+        "resource_id",
+        "osd_key",
+        "title",
+        "authors",
+        "year",
+        "organism",
+        "mission",
+        "_metadata",
+        "_metadata_loader",
+        "embedding",
+        "embedding_model",
+        "embedding_hash",
+    )
+
+    type = "Experiment"
+    icon = "🔬"
+
+    def __init__(
+        self,
+        osd_key: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        summary: Optional[Dict[str, Any]] = None,
+        metadata_loader: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.resource_id: Optional[int] = None
         self.osd_key = osd_key
-        self.type = "Experiment"
-        self.icon = "🔬"
         self._metadata = metadata
+        self._metadata_loader = metadata_loader
+        if summary is None:
+            summary = self._summarize(metadata or {})
+        self.title = summary.get("title")
+        self.authors = summary.get("authors")
+        self.year = summary.get("year")
+        self.organism = summary.get("organism")
+        self.mission = summary.get("mission")
+        self.embedding = None
+        self.embedding_model = None
+        self.embedding_hash = None
+
+    @staticmethod
+    def _summarize(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "title": metadata.get("study title", None),
+            "authors": metadata.get("study publication author list"),
+            "year": _release_year(metadata.get("study public release date", None)),
+            "organism": metadata.get("organism"),
+            "mission": metadata.get("mission"),
+        }
 
     @property
-    def title(self):
-        return self._metadata.get("study title", None)
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is not None:
+            return self._metadata
+        if self._metadata_loader is not None:
+            return self._metadata_loader() or {}
+        return {}
 
     @property
     def description(self):
-        return self._metadata.get("study description")
+        return self.metadata.get("study description")
 
     @property
     def abstract(self):
         return self.description
 
     @property
-    def authors(self):
-        return self._metadata.get("study publication author list")
-
-    @property
-    def year(self):
-        timestamp = self._metadata.get("study public release date", None)
-        if timestamp is None:
-            return timestamp
-        else:
-            year = datetime.datetime.utcfromtimestamp(timestamp).year
-            return str(year)
+    def publication_titles(self) -> List[str]:
+        titles = self.metadata.get("study publication title", None)
+        if isinstance(titles, str):
+            return [titles]
+        return [title for title in titles or [] if isinstance(title, str)]
 
     @property
     def publications(self) -> List[PaperResource]:
-        titles = self._metadata.get("study publication title", None)
-        if isinstance(titles, str):
-            titles = [titles]
-
-        publications = []
-        if titles is None:
-            return publications
-        for title in titles:
-            publication_id = PAPER_TITLE_INDEX.get(title, None)
-            if publication_id is None:
-                # print(f"Could not find publication with title '{title}'")
-                continue
-
-            publication = RESOURCES[publication_id]
-            publications.append(publication)
-        return publications
+        return _linked_resources(self.resource_id)  # type: ignore[return-value]
 
     def get_property(self, key: str):
-        return self._metadata.get(key, None)
+        return self.metadata.get(key, None)
 
     @property
     def paper_url(self) -> Optional[Tuple[str, str]]:
@@ -214,6 +320,15 @@ ResourceType = Union[PaperResource, ExperimentResource]
 RESOURCES: Dict[int, ResourceType] = {}
 PAPER_TITLE_INDEX: Dict[str, int] = {}
 
+# Contiguous view over all resource embeddings, rebuilt whenever RESOURCES changes.
+# Row ``i`` of EMBEDDING_MATRIX belongs to resource ``EMBEDDING_ROW_IDS[i]``.
+EMBEDDING_MATRIX: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+EMBEDDING_ROW_IDS: np.ndarray = np.zeros(0, dtype=np.int64)
+TYPE_ROW_MASKS: Dict[str, np.ndarray] = {}
+ANN_INDEX: Optional[IVFIndex] = None
+LEXICAL_INDEX: Optional[LexicalIndex] = None
+LINK_INDEX: Optional[LinkIndex] = None
+
 
 _next_id = 0
 
@@ -225,45 +340,89 @@ def gen_id():
     return id
 
 
-def _load_publications():
+def _register_resource(resource_id: int, resource: ResourceType) -> None:
+    global _next_id
+
+    resource.resource_id = resource_id
+    RESOURCES[resource_id] = resource
+    if isinstance(resource, PaperResource):
+        PAPER_TITLE_INDEX[resource.title] = resource_id
+    _next_id = max(_next_id, resource_id + 1)
+
+
+def _source_key(resource: ResourceType) -> str:
+    if isinstance(resource, PaperResource):
+        return f"paper:{resource.title}"
+    return f"experiment:{resource.osd_key}"
+
+
+def _load_publications(known_ids: Optional[Dict[str, int]] = None):
     df = read_csv(PUBLICATIONS_PATH)
     data = df.dropna(subset=["Title"]).drop_duplicates(subset=["Title"])
 
     for _, row in data.iterrows():
         resource = PaperResource(title=row["Title"])
-        id = gen_id()
-        RESOURCES[id] = resource
+        id = (known_ids or {}).get(_source_key(resource))
+        if id is None:
+            id = gen_id()
+        _register_resource(id, resource)
 
-        PAPER_TITLE_INDEX[resource.title] = id
 
-
-def _load_experiments():
+def _load_experiments(known_ids: Optional[Dict[str, int]] = None):
     with open(EXPERIMENTS_PATH, "rb") as f:
         experiment_data: Dict[str, dict] = pickle.load(f)
 
     for osd_key, experiment in experiment_data.items():
         metadata: dict = experiment["metadata"]
-        id = gen_id()
         resource = ExperimentResource(osd_key, metadata)
-        RESOURCES[id] = resource
-
-        for pub in resource.publications:
-            pub._experiments.append(resource)
+        id = (known_ids or {}).get(_source_key(resource))
+        if id is None:
+            id = gen_id()
+        _register_resource(id, resource)
 
     """
     dict_keys(['authoritative source url', 'flight program', 'mission', 'material type', 'project identifier', 'accession', 'identifiers', 'study identifier', 'study protocol name', 'study assay technology type', 'acknowledgments', 'study assay technology platform', 'study person', 'study protocol type', 'space program', 'study title', 'study factor type', 'study public release date', 'parameter value', 'thumbnail', 'study factor name', 'study assay measurement type', 'project type', 'factor value', 'data source accession', 'project title', 'study funding agency', 'study protocol description', 'experiment platform', 'characteristics', 'study grant number', 'study publication author list', 'project link', 'study publication title', 'managing nasa center', 'study description', 'organism', 'data source type'])
     """
 
 
+def refresh_from_sources() -> None:
+    """Re-read the publication CSV and OSDR export on top of the loaded snapshot.
+
+    Resources are matched by paper title or OSD key so they keep their ids and
+    embeddings; the content hashes then decide which of them need re-embedding.
+    """
+    global RESOURCES
+
+    previous = RESOURCES
+    known_ids = {_source_key(resource): id for id, resource in previous.items()}
+
+    RESOURCES = {}
+    PAPER_TITLE_INDEX.clear()
+    _load_publications(known_ids)
+    _load_experiments(known_ids)
+
+    for id, resource in RESOURCES.items():
+        old = previous.get(id)
+        if old is None or _source_key(old) != _source_key(resource):
+            continue
+        resource.embedding = old.embedding
+        resource.embedding_model = old.embedding_model
+        resource.embedding_hash = old.embedding_hash
+
+
 def _get_openai_client() -> Optional[OpenAI]:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key and st is not None:
-        api_key = (
-            st.secrets.get("OPENAI_API_KEY") if "OPENAI_API_KEY" in st.secrets else None
-        )
+        try:
+            api_key = (
+                st.secrets.get("OPENAI_API_KEY") if "OPENAI_API_KEY" in st.secrets else None
+            )
+        except Exception:  # noqa: BLE001 - no secrets.toml configured
+            api_key = None
     if not api_key:
         return None
-    return OpenAI(api_key=api_key)
+    # SCHEDULER owns retries; SDK retries would multiply them.
+    return OpenAI(api_key=api_key, max_retries=0)
 
 
 def _normalize_vector(values: List[float]) -> Optional[List[float]]:
@@ -315,31 +474,78 @@ def _embedding_text(resource: ResourceType) -> Optional[str]:
     return None
 
 
-def _ensure_embeddings() -> bool:
-    client = _get_openai_client()
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+EmbeddingTarget = Tuple[ResourceType, Optional[str], Optional[str]]
+
+
+def _plan_embedding_refresh() -> Tuple[List[EmbeddingTarget], Dict[str, int], bool]:
+    """Work out which resources need (re-)embedding from their content hashes.
+
+    Returns the ``(resource, text, hash)`` targets, a report of counts and whether
+    any resource was changed in place (defaults set or hashes backfilled).
+    """
+    report = dict.fromkeys(
+        ("new", "changed", "model_changed", "unchanged", "empty", "backfilled"), 0
+    )
+    targets: List[EmbeddingTarget] = []
     updated = False
 
-    targets: List[ResourceType] = []
     for resource in RESOURCES.values():
-        if not hasattr(resource, "embedding"):
-            resource.embedding = None  # type: ignore[attr-defined]
-            updated = True
-        if not hasattr(resource, "embedding_model"):
-            resource.embedding_model = None  # type: ignore[attr-defined]
+        text = _prepare_text_for_embedding(_embedding_text(resource))
+        digest = _text_hash(text) if text else None
+        model = resource.embedding_model  # type: ignore[union-attr]
+        embedding = resource.embedding  # type: ignore[union-attr]
+        stored_hash = resource.embedding_hash  # type: ignore[union-attr]
+
+        if text is None:
+            report["empty"] += 1
+            if model != EMBED_MODEL or embedding is not None:
+                targets.append((resource, None, None))
+        elif model != EMBED_MODEL:
+            report["new" if model is None and embedding is None else "model_changed"] += 1
+            targets.append((resource, text, digest))
+        elif embedding is None:
+            report["new"] += 1
+            targets.append((resource, text, digest))
+        elif stored_hash is None:
+            # Snapshots written before hashing existed: trust the stored vector.
+            resource.embedding_hash = digest  # type: ignore[attr-defined]
+            report["backfilled"] += 1
+            report["unchanged"] += 1
             updated = True
+        elif stored_hash != digest:
+            report["changed"] += 1
+            targets.append((resource, text, digest))
+        else:
+            report["unchanged"] += 1
 
-        if (
-            getattr(resource, "embedding_model", None) != EMBED_MODEL
-            or getattr(resource, "embedding", None) is None
-        ):
-            targets.append(resource)
+    to_embed = sum(1 for _, text, _ in targets if text)
+    report["texts_to_embed"] = to_embed
+    report["api_calls"] = math.ceil(to_embed / EMBED_BATCH_SIZE)
+    return targets, report, updated
+
+
+def embedding_refresh_report() -> Dict[str, int]:
+    """Dry run: count how many texts and API calls a refresh would need."""
+    _, report, _ = _plan_embedding_refresh()
+    return report
+
+
+def _ensure_embeddings() -> bool:
+    client = _get_openai_client()
+    targets, _, updated = _plan_embedding_refresh()
 
     if not targets:
         return updated
 
+    use_streamlit_ui = _streamlit_active()
+
     if client is None:
         message = "OpenAI API key missing. Embedding refresh skipped; search quality may degrade."
-        if st is not None:
+        if use_streamlit_ui:
             st.warning(message)
         else:
             print(message)
@@ -348,13 +554,14 @@ def _ensure_embeddings() -> bool:
     total = len(targets)
     processed = 0
 
-    progress_bar = st.progress(0.0) if st is not None else None
-    status_placeholder = st.empty() if st is not None else None
+    progress_bar = st.progress(0.0) if use_streamlit_ui else None
+    status_placeholder = st.empty() if use_streamlit_ui else None
 
     def update_progress() -> None:
         if total == 0:
             return
         fraction = min(processed / total, 1.0)
+        _set_load_status(message=f"Generating embeddings… {processed}/{total}")
         if progress_bar is not None:
             progress_bar.progress(fraction)
             text = f"Generating embeddings… {processed}/{total}"
@@ -362,51 +569,63 @@ def _ensure_embeddings() -> bool:
         elif processed == total or processed % 25 == 0:
             print(f"[Embeddings] processed {processed}/{total}")
 
-    pending_texts: List[str] = []
-    pending_items: List[ResourceType] = []
-
-    def flush_batch() -> None:
-        nonlocal pending_texts, pending_items, updated
-        if not pending_texts:
-            return
-        try:
-            response = client.embeddings.create(model=EMBED_MODEL, input=pending_texts)
-        except Exception as exc:  # noqa: BLE001
-            if st is not None:
-                st.error(f"Failed to create embeddings: {exc}")
-            else:
-                print(f"Failed to create embeddings: {exc}")
-            pending_texts = []
-            pending_items = []
-            return
-
-        for datum, resource in zip(response.data, pending_items):
-            normalized = _normalize_vector(datum.embedding)
-            resource.embedding = normalized  # type: ignore[attr-defined]
-            resource.embedding_model = EMBED_MODEL  # type: ignore[attr-defined]
-            updated = True
-
-        pending_texts = []
-        pending_items = []
-
-    for resource in targets:
-        text = _prepare_text_for_embedding(_embedding_text(resource))
+    batches: List[List[Tuple[ResourceType, str, Optional[str]]]] = []
+    pending: List[Tuple[ResourceType, str, Optional[str]]] = []
+    for resource, text, digest in targets:
         if not text:
             resource.embedding = None  # type: ignore[attr-defined]
             resource.embedding_model = EMBED_MODEL  # type: ignore[attr-defined]
+            resource.embedding_hash = None  # type: ignore[attr-defined]
             updated = True
             processed += 1
-            update_progress()
             continue
+        pending.append((resource, text, digest))
+        if len(pending) >= EMBED_BATCH_SIZE:
+            batches.append(pending)
+            pending = []
+    if pending:
+        batches.append(pending)
+    update_progress()
 
-        pending_texts.append(text)
-        pending_items.append(resource)
-        if len(pending_texts) >= EMBED_BATCH_SIZE:
-            flush_batch()
-        processed += 1
-        update_progress()
+    def embed_batch(texts: List[str]) -> List[List[float]]:
+        # Pacing, retries and backoff come from the shared OpenAI host policy.
+        response = SCHEDULER.call(
+            OPENAI_HOST,
+            lambda: client.embeddings.create(model=EMBED_MODEL, input=texts),
+            tokens=estimate_tokens(texts),
+        )
+        return [datum.embedding for datum in response.data]
+
+    completed_batches = 0
+    with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(embed_batch, [text for _, text, _ in batch]): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                vectors = future.result()
+            except Exception as exc:  # noqa: BLE001
+                if use_streamlit_ui:
+                    st.error(f"Failed to create embeddings: {exc}")
+                else:
+                    print(f"Failed to create embeddings: {exc}")
+                vectors = []
+
+            for vector, (resource, _, digest) in zip(vectors, batch):
+                resource.embedding = _normalize_vector(vector)  # type: ignore[attr-defined]
+                resource.embedding_model = EMBED_MODEL  # type: ignore[attr-defined]
+                resource.embedding_hash = digest  # type: ignore[attr-defined]
+                updated = True
+
+            processed += len(batch)
+            completed_batches += 1
+            update_progress()
+
+            if vectors and completed_batches % EMBED_CHECKPOINT_EVERY == 0:
+                save_repository_snapshot(SNAPSHOT_DIR)
 
-    flush_batch()
     processed = total
     update_progress()
 
@@ -431,83 +650,331 @@ def _apply_embeddings_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> bool:
     return hydrated
 
 
-def _serialize_repository() -> Dict[str, Any]:
-    metadata: Dict[str, Dict[str, Any]] = {"papers": {}, "experiments": {}}
-    embeddings: Dict[str, Dict[str, Any]] = {}
-
+def _build_resource_table() -> ResourceTable:
+    table = ResourceTable()
     for resource_id, resource in RESOURCES.items():
-        key = str(resource_id)
         if isinstance(resource, PaperResource):
-            metadata["papers"][key] = {"title": resource.title}
-        elif isinstance(resource, ExperimentResource):
-            metadata["experiments"][key] = {
-                "osd_key": resource.osd_key,
-                "metadata": resource._metadata,
-            }
-
-        embedding = getattr(resource, "embedding", None)
-        if embedding is not None:
-            embeddings[key] = {
-                "embedding": list(map(float, embedding)),
-                "title": getattr(resource, "title", "Untitled"),
-                "type": getattr(resource, "type", "Unknown"),
-                "year": getattr(resource, "year", None),
-            }
-
-    return {"metadata": metadata, "embeddings": embeddings}
-
-
-def _write_repository_snapshot(path, payload: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-
-    tmp_file = tempfile.NamedTemporaryFile(
-        "wb",
-        delete=False,
-        dir=path.parent,
-        prefix="resources_",
-        suffix=".tmp",
+            # Only use metadata that is already cached; saving must not hit OpenAlex.
+            work = resource.cached_data or {}
+            authors = [
+                entry.get("author", {}).get("display_name")
+                for entry in work.get("authorships", [])
+                if isinstance(entry, dict)
+            ]
+            table.append(
+                resource_id,
+                type=resource.type,
+                key=resource.title,
+                title=resource.title,
+                year=work.get("publication_year"),
+                authors=authors or None,
+            )
+        else:
+            table.append(
+                resource_id,
+                type=resource.type,
+                key=resource.osd_key,
+                title=resource.title,
+                year=resource.year,
+                authors=resource.authors,
+                organism=resource.organism,
+                mission=resource.mission,
+            )
+    return table
+
+
+def _serialize_metadata() -> Dict[str, Any]:
+    embedding_hashes: Dict[str, str] = {}
+    # Recorded per row: a run interrupted mid model change holds vectors from both models.
+    embedding_models: Dict[str, str] = {}
+    for resource_id, resource in RESOURCES.items():
+        if resource.embedding_hash:
+            embedding_hashes[str(resource_id)] = resource.embedding_hash
+        model = getattr(resource, "embedding_model", None)
+        if model:
+            embedding_models[str(resource_id)] = model
+
+    return {
+        "table": _build_resource_table().to_columns(),
+        "embedding_hashes": embedding_hashes,
+        "embedding_models": embedding_models,
+    }
+
+
+def _heavy_records() -> Dict[str, Any]:
+    return {
+        str(resource_id): resource.metadata
+        for resource_id, resource in RESOURCES.items()
+        if isinstance(resource, ExperimentResource)
+    }
+
+
+def save_repository_snapshot(directory=SNAPSHOT_DIR) -> None:
+    matrix, row_ids = _stack_embeddings()
+    # A complete snapshot lets the next start skip the embedding pass entirely.
+    complete = all(
+        getattr(resource, "embedding_model", None) == EMBED_MODEL
+        for resource in RESOURCES.values()
+    )
+    write_snapshot(
+        directory,
+        embeddings=matrix,
+        row_ids=row_ids,
+        metadata=_serialize_metadata(),
+        embedding_model=EMBED_MODEL,
+        heavy_records=_heavy_records(),
+        extra={"complete": complete},
     )
-    try:
-        with tmp_file as handle:
-            pickle.dump(payload, handle)
-        os.replace(tmp_file.name, path)
-    except Exception:  # noqa: BLE001
-        os.unlink(tmp_file.name)
-        raise
-
-
-def save_repository_snapshot(path=RESOURCE_PATH) -> None:
-    payload = _serialize_repository()
-    _write_repository_snapshot(path, payload)
 
 
-def _deserialize_resources(snapshot: Dict[str, Any]) -> None:
-    global RESOURCES, PAPER_TITLE_INDEX, _next_id
+def _reset_resources() -> None:
+    global RESOURCES, _next_id
 
     RESOURCES = {}
     PAPER_TITLE_INDEX.clear()
     _next_id = 0
 
+
+def _deserialize_resources(snapshot: Dict[str, Any]) -> None:
+    """Rebuild RESOURCES from a legacy ``resources.pkl`` payload."""
+    _reset_resources()
+
     metadata = snapshot.get("metadata", {})
 
     for id_str, data in metadata.get("papers", {}).items():
-        resource_id = int(id_str)
-        resource = PaperResource(title=data.get("title", "Untitled"))
-        RESOURCES[resource_id] = resource
-        PAPER_TITLE_INDEX[resource.title] = resource_id
-        _next_id = max(_next_id, resource_id + 1)
+        _register_resource(int(id_str), PaperResource(title=data.get("title", "Untitled")))
 
     for id_str, data in metadata.get("experiments", {}).items():
-        resource_id = int(id_str)
         resource = ExperimentResource(data.get("osd_key"), data.get("metadata", {}))
-        RESOURCES[resource_id] = resource
-        for publication in resource.publications:
-            publication._experiments.append(resource)
-        _next_id = max(_next_id, resource_id + 1)
+        _register_resource(int(id_str), resource)
 
     embeddings_snapshot = snapshot.get("embeddings", {})
     _apply_embeddings_snapshot(embeddings_snapshot)
 
+
+def _deserialize_table(metadata: Dict[str, Any], heavy) -> None:
+    """Rebuild RESOURCES from the snapshot's columnar table without heavy metadata."""
+    _reset_resources()
+    table = ResourceTable.from_columns(metadata.get("table", {}))
+    spans: Dict[str, Tuple[int, int]] = metadata.get("heavy_spans", {})
+
+    for row in table.rows():
+        resource_id = row["id"]
+        if row["type"] == PaperResource.type:
+            _register_resource(resource_id, PaperResource(title=row["title"] or "Untitled"))
+            continue
+        span = spans.get(str(resource_id))
+        loader = partial(heavy.read, span) if heavy is not None and span else None
+        resource = ExperimentResource(row["key"], summary=row, metadata_loader=loader)
+        _register_resource(resource_id, resource)
+
+
+def _read_repository_snapshot() -> Optional[Dict[str, Any]]:
+    """Hydrate RESOURCES from the memory-mapped snapshot directory.
+
+    Returns the snapshot manifest, or ``None`` if no usable snapshot exists.
+    """
+    snapshot = read_snapshot(SNAPSHOT_DIR)
+    if snapshot is None:
+        return None
+
+    _deserialize_table(snapshot["metadata"], snapshot["heavy"])
+
+    matrix: np.ndarray = snapshot["embeddings"]
+    row_ids: np.ndarray = snapshot["row_ids"]
+    manifest: Dict[str, Any] = snapshot["manifest"]
+    embedding_model = manifest.get("embedding_model")
+    embedding_hashes: Dict[str, str] = snapshot["metadata"].get("embedding_hashes", {})
+    embedding_models: Dict[str, str] = snapshot["metadata"].get("embedding_models", {})
+    rows_by_id = {resource_id: row for row, resource_id in enumerate(row_ids.tolist())}
+    for resource_id, resource in RESOURCES.items():
+        resource.embedding_hash = embedding_hashes.get(str(resource_id))  # type: ignore[attr-defined]
+        row = rows_by_id.get(resource_id)
+        # Row views keep reading from the shared mapping instead of copying.
+        resource.embedding = matrix[row] if row is not None else None  # type: ignore[attr-defined]
+        if row is not None or manifest.get("complete"):
+            model = embedding_models.get(str(resource_id), embedding_model)
+        else:
+            model = None
+        # Rows from another model are re-embedded by the next embedding pass.
+        resource.embedding_model = model  # type: ignore[attr-defined]
+
+    _set_embedding_matrix(matrix, row_ids)
+    return manifest
+
+
+def _read_legacy_snapshot() -> bool:
+    if not RESOURCE_PATH.exists():
+        return False
+    try:
+        with open(RESOURCE_PATH, "rb") as file:
+            snapshot = pickle.load(file)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return False
+    if not isinstance(snapshot, dict):
+        return False
+    _deserialize_resources(snapshot)
+    return True
+
+
+def _stack_embeddings() -> Tuple[np.ndarray, np.ndarray]:
+    """Collect resource embeddings into a float32 matrix and its row-to-id array."""
+    row_ids: List[int] = []
+    vectors: List[Any] = []
+    dimension: Optional[int] = None
+    for id, resource in RESOURCES.items():
+        embedding = getattr(resource, "embedding", None)
+        if embedding is None or len(embedding) == 0:
+            continue
+        if dimension is None:
+            dimension = len(embedding)
+        elif len(embedding) != dimension:
+            print(
+                f"Leaving resource {id} out of the embedding matrix: "
+                f"dimension {len(embedding)} != {dimension}"
+            )
+            continue
+        row_ids.append(id)
+        vectors.append(embedding)
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return (
+        np.ascontiguousarray(np.asarray(vectors, dtype=np.float32)),
+        np.asarray(row_ids, dtype=np.int64),
+    )
+
+
+def _set_embedding_matrix(matrix: np.ndarray, row_ids: np.ndarray) -> None:
+    global EMBEDDING_MATRIX, EMBEDDING_ROW_IDS, TYPE_ROW_MASKS
+
+    EMBEDDING_MATRIX = matrix
+    EMBEDDING_ROW_IDS = row_ids
+
+    row_types = np.asarray(
+        [RESOURCES[id].type.lower() if id in RESOURCES else "" for id in row_ids.tolist()]
+    )
+    TYPE_ROW_MASKS = {
+        typ: row_types == typ for typ in np.unique(row_types).tolist() if typ
+    }
+
+
+def _rebuild_embedding_matrix() -> None:
+    _set_embedding_matrix(*_stack_embeddings())
+
+
+def _load_ann_index() -> None:
+    global ANN_INDEX
+
+    index = IVFIndex.load(ANN_INDEX_PATH)
+    if index is not None and not index.matches(EMBEDDING_ROW_IDS):
+        print(f"Ignoring stale ANN index at {ANN_INDEX_PATH}; rebuild it with build_artifacts.")
+        index = None
+    ANN_INDEX = index
+
+
+def _lexical_text(resource: ResourceType) -> str:
+    parts: List[str] = []
+    title = getattr(resource, "title", None)
+    if title:
+        parts.append(str(title))
+    if isinstance(resource, PaperResource):
+        work = resource.cached_data
+        if work:
+            parts.append(get_abstract_text(work))
+    elif isinstance(resource, ExperimentResource):
+        description = resource.description
+        if isinstance(description, list):
+            description = " ".join(str(part) for part in description if part)
+        if description:
+            parts.append(str(description))
+    return " ".join(parts)
+
+
+def _lexical_documents() -> List[Tuple[int, str]]:
+    return [(id, _lexical_text(resource)) for id, resource in RESOURCES.items()]
+
+
+def build_lexical_index(documents: Optional[List[Tuple[int, str]]] = None) -> LexicalIndex:
+    """Index titles, cached abstracts and experiment descriptions for BM25 search."""
+    return LexicalIndex.build(_lexical_documents() if documents is None else documents)
+
+
+def _load_lexical_index() -> None:
+    global LEXICAL_INDEX
+
+    # Hashing the indexed text, not just the ids, catches edited titles/abstracts.
+    documents = _lexical_documents()
+    index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+    if index is None or not index.matches(documents_hash(documents)):
+        index = build_lexical_index(documents)
+        try:
+            index.save(LEXICAL_INDEX_PATH)
+        except OSError as exc:
+            print(f"Unable to persist lexical index: {exc}")
+    LEXICAL_INDEX = index
+
+
+def build_link_index() -> Tuple[LinkIndex, Dict[str, int]]:
+    """Resolve every experiment's publication titles to paper ids.
+
+    Returns the index and how many titles matched exactly, after normalization,
+    fuzzily, or not at all.
+    """
+    matcher = TitleMatcher(
+        (resource.title, id)
+        for id, resource in RESOURCES.items()
+        if isinstance(resource, PaperResource)
+    )
+    edges: List[Tuple[int, int]] = []
+    for id, resource in RESOURCES.items():
+        if not isinstance(resource, ExperimentResource):
+            continue
+        for title in resource.publication_titles:
+            publication_id = matcher.match(title)
+            if publication_id is not None:
+                edges.append((id, publication_id))
+
+    resource_ids = np.fromiter(sorted(RESOURCES), dtype=np.int64, count=len(RESOURCES))
+    return LinkIndex.build(edges, resource_ids), matcher.stats
+
+
+def _load_link_index(*, rebuild: bool = False) -> None:
+    global LINK_INDEX
+
+    resource_ids = np.fromiter(sorted(RESOURCES), dtype=np.int64, count=len(RESOURCES))
+    index = None if rebuild else LinkIndex.load(LINK_INDEX_PATH)
+    if index is None or not index.matches(resource_ids):
+        index, _ = build_link_index()
+        try:
+            index.save(LINK_INDEX_PATH)
+        except OSError as exc:
+            print(f"Unable to persist link index: {exc}")
+    LINK_INDEX = index
+
+
+def _linked_resources(resource_id: Optional[int]) -> List[ResourceType]:
+    if LINK_INDEX is None or resource_id is None:
+        return []
+    return [
+        RESOURCES[linked_id]
+        for linked_id in LINK_INDEX.neighbors_of(resource_id).tolist()
+        if linked_id in RESOURCES
+    ]
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the ``k`` largest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
 def _search_fallback(
     query: str,
     limit: int,
@@ -527,15 +994,14 @@ def _search_fallback(
         if not allowed_normalized:
             return []
 
-    for id, resource in RESOURCES.items():
-        if allowed_normalized is not None and resource.type.lower() not in allowed_normalized:
-            continue
-        haystacks = [getattr(resource, "title", "") or ""]
-        abstract = getattr(resource, "abstract", None) or ""
-        if abstract:
-            haystacks.append(abstract)
-        if any(needle in value.lower() for value in haystacks if value):
-            hits.append((id, resource, 0.0))
+    if LEXICAL_INDEX is not None:
+        for id, score in LEXICAL_INDEX.ranked(needle):
+            resource = RESOURCES.get(id)
+            if resource is None:
+                continue
+            if allowed_normalized is not None and resource.type.lower() not in allowed_normalized:
+                continue
+            hits.append((id, resource, score))
             seen.add(id)
             if len(hits) >= limit:
                 break
@@ -553,11 +1019,40 @@ def _search_fallback(
     return hits
 
 
+_ann_search_lock = threading.Lock()
+_ann_search_counters: Dict[str, int] = dict.fromkeys(
+    ("searches", "widened", "exact_fallbacks"), 0
+)
+
+
+def _count_ann_search(name: str) -> None:
+    with _ann_search_lock:
+        _ann_search_counters[name] += 1
+
+
+def ann_search_stats() -> Dict[str, int]:
+    with _ann_search_lock:
+        return dict(_ann_search_counters)
+
+
+def ann_search_summary() -> Optional[str]:
+    """One-line summary of ``ann_search_stats()``, or ``None`` while no search degraded."""
+    stats = ann_search_stats()
+    if not stats["widened"] and not stats["exact_fallbacks"]:
+        return None
+    return (
+        f"Vector index: {stats['searches']} searches, {stats['widened']} probed more lists "
+        f"for a type filter, {stats['exact_fallbacks']} fell back to an exact scan."
+    )
+
+
 def search_resources(
     query: str,
     limit: int = 10,
     *,
     resource_types: Optional[Iterable[str]] = None,
+    nprobe: int = DEFAULT_NPROBE,
+    exact: bool = False,
 ) -> List[Tuple[int, ResourceType, float]]:
     if not query or not query.strip():
         return []
@@ -573,10 +1068,7 @@ def search_resources(
         return _search_fallback(query, limit, allowed_types=allowed_normalized)
 
     try:
-        response = client.embeddings.create(
-            model=EMBED_MODEL,
-            input=[query.strip()[:EMBED_MAX_CHARS]],
-        )
+        raw_vector = embed_query(client, query.strip()[:EMBED_MAX_CHARS], model=EMBED_MODEL)
     except Exception as exc:  # noqa: BLE001
         if st is not None:
             st.warning(f"Falling back to basic search: {exc}")
@@ -584,33 +1076,68 @@ def search_resources(
             print(f"Falling back to basic search: {exc}")
         return _search_fallback(query, limit, allowed_types=allowed_normalized)
 
-    query_vector = _normalize_vector(response.data[0].embedding)
+    query_vector = _normalize_vector(raw_vector)
     if query_vector is None:
         return _search_fallback(query, limit, allowed_types=allowed_normalized)
 
     query_array = np.asarray(query_vector, dtype=np.float32)
 
-    scored: List[Tuple[float, int, ResourceType]] = []
-    for id, resource in RESOURCES.items():
-        if allowed_normalized is not None and resource.type.lower() not in allowed_normalized:
-            continue
-        embedding = getattr(resource, "embedding", None)
-        if not embedding:
-            continue
-        resource_array = np.asarray(embedding, dtype=np.float32)
-        score = float(np.dot(resource_array, query_array))
-        scored.append((score, id, resource))
-
-    if not scored:
+    matrix = EMBEDDING_MATRIX
+    row_ids = EMBEDDING_ROW_IDS
+    if matrix.shape[0] == 0 or matrix.shape[1] != query_array.shape[0]:
         return _search_fallback(query, limit, allowed_types=allowed_normalized)
 
-    scored.sort(reverse=True)
+    mask: Optional[np.ndarray] = None
+    if allowed_normalized is not None:
+        mask = np.zeros(matrix.shape[0], dtype=bool)
+        for typ in allowed_normalized:
+            type_mask = TYPE_ROW_MASKS.get(typ)
+            if type_mask is not None:
+                mask |= type_mask
+        if not mask.any():
+            return _search_fallback(query, limit, allowed_types=allowed_normalized)
+
+    top_rows: Optional[np.ndarray] = None
+    top_scores: Optional[np.ndarray] = None
+    if not exact and ANN_INDEX is not None and matrix.shape[0] >= ANN_MIN_ROWS:
+        candidates = matrix.shape[0] if mask is None else int(mask.sum())
+        wanted = min(limit, candidates)
+        _count_ann_search("searches")
+        top_rows, top_scores = ANN_INDEX.search(
+            matrix, query_array, limit, nprobe=nprobe, row_mask=mask
+        )
+        if top_rows.size < wanted and candidates < matrix.shape[0]:
+            # A filter keeping a fraction f of the rows leaves about f of each probed
+            # list, so probe 1/f times as many lists before giving up on the index.
+            widened = min(ANN_INDEX.n_lists, math.ceil(nprobe * matrix.shape[0] / candidates))
+            if widened > nprobe:
+                _count_ann_search("widened")
+                top_rows, top_scores = ANN_INDEX.search(
+                    matrix, query_array, limit, nprobe=widened, row_mask=mask
+                )
+        if top_rows.size < wanted:
+            # Still too sparse for this filter; answer exactly instead.
+            _count_ann_search("exact_fallbacks")
+            top_rows = None
+
+    if top_rows is None:
+        if mask is not None:
+            candidate_rows = np.flatnonzero(mask)
+            scores = np.asarray(matrix[candidate_rows], dtype=np.float32) @ query_array
+            best = _top_k_indices(scores, limit)
+            top_rows, top_scores = candidate_rows[best], scores[best]
+        else:
+            scores = matrix @ query_array
+            top_rows = _top_k_indices(scores, limit)
+            top_scores = scores[top_rows]
 
     results: List[Tuple[int, ResourceType, float]] = []
-    for score, id, resource in scored:
-        results.append((id, resource, score))
-        if len(results) >= limit:
-            break
+    for row, score in zip(top_rows.tolist(), top_scores.tolist()):
+        id = int(row_ids[row])
+        resource = RESOURCES.get(id)
+        if resource is None:
+            continue
+        results.append((id, resource, float(score)))
 
     return results
 
@@ -642,27 +1169,42 @@ def sample_resources(
     return random.sample(pool, count)
 
 
-def _load_resources() -> None:
-    global RESOURCES
-
-    snapshot: Optional[Dict[str, Any]] = None
-    if RESOURCE_PATH.exists():
-        try:
-            with open(RESOURCE_PATH, "rb") as file:
-                snapshot = pickle.load(file)
-        except (EOFError, pickle.UnpicklingError, AttributeError, ValueError):
-            snapshot = None
-    if isinstance(snapshot, dict):
-        _deserialize_resources(snapshot)
+def _load_resources(
+    *,
+    refresh_sources: bool = False,
+    embed: bool = True,
+    text_indexes: bool = True,
+    persist: bool = True,
+) -> None:
+    manifest = _read_repository_snapshot()
+    snapshot_loaded = manifest is not None
+    if not snapshot_loaded:
+        _set_load_status(message="Building resource repository…")
+        _read_legacy_snapshot()
 
     if len(RESOURCES) == 0:
         _load_publications()
         _load_experiments()
-        snapshot = None
+    elif refresh_sources:
+        refresh_from_sources()
 
-    updated = _ensure_embeddings()
+    if not embed:
+        return
 
-    if updated or snapshot is None:
+    snapshot_complete = (
+        snapshot_loaded
+        and not refresh_sources
+        and bool(manifest.get("complete"))  # type: ignore[union-attr]
+        and manifest.get("embedding_model") == EMBED_MODEL  # type: ignore[union-attr]
+    )
+    updated = False if snapshot_complete else _ensure_embeddings()
+    updated = updated or refresh_sources
+
+    if updated or not snapshot_loaded:
+        _rebuild_embedding_matrix()
+
+    # Callers passing persist=False write the snapshot themselves, once.
+    if persist and (updated or not snapshot_loaded):
         use_streamlit_ui = _streamlit_active()
         spinner: ContextManager[Any]
         if use_streamlit_ui:
@@ -670,11 +1212,75 @@ def _load_resources() -> None:
         else:
             spinner = nullcontext()
 
+        _set_load_status(message="Saving resource snapshot…")
         with spinner:
-            save_repository_snapshot(RESOURCE_PATH)
+            save_repository_snapshot(SNAPSHOT_DIR)
         if not use_streamlit_ui:
-            print(f"Resource snapshot saved to {RESOURCE_PATH}")
+            print(f"Resource snapshot saved to {SNAPSHOT_DIR}")
+
+    _set_load_status(message="Preparing search indexes…")
+    _load_ann_index()
+    if text_indexes:
+        _load_lexical_index()
+        _load_link_index(rebuild=refresh_sources)
+
+
+_load_lock = threading.Lock()
+_load_thread: Optional[threading.Thread] = None
+_load_finished = threading.Event()
+_load_status: Dict[str, Any] = {"state": "idle", "message": "", "error": None}
+
+
+def _set_load_status(**changes: Any) -> None:
+    with _load_lock:
+        _load_status.update(changes)
+
+
+def get_load_status() -> Dict[str, Any]:
+    """Return ``state`` (idle/loading/ready/failed), a progress ``message`` and ``error``."""
+    with _load_lock:
+        return dict(_load_status)
+
+
+def resources_ready() -> bool:
+    return get_load_status()["state"] == "ready"
+
+
+def _background_load() -> None:
+    try:
+        _load_resources()
+    except Exception as exc:  # noqa: BLE001
+        _set_load_status(state="failed", message="Loading resources failed.", error=str(exc))
+        print(f"Loading resources failed: {exc}")
+    else:
+        _set_load_status(state="ready", message=f"{len(RESOURCES)} resources loaded.")
+    finally:
+        _load_finished.set()
+
+
+def start_loading_resources(*, retry: bool = False) -> None:
+    """Hydrate the repository in a background thread; safe to call on every rerun.
+
+    A failed load stays failed until a caller passes ``retry=True``, which starts
+    over from an empty repository.
+    """
+    global _load_thread
+
+    with _load_lock:
+        if _load_thread is not None:
+            if not (retry and _load_status["state"] == "failed"):
+                return
+            _reset_resources()
+            _load_finished.clear()
+        _load_status.update(state="loading", message="Loading resource snapshot…", error=None)
+        _load_thread = threading.Thread(
+            target=_background_load, name="resource-loader", daemon=True
+        )
+        _load_thread.start()
 
 
-# Load resources statically once on server startup
-_load_resources()
+def ensure_resources_loaded(timeout: Optional[float] = None) -> bool:
+    """Start loading if needed and block until it finishes or ``timeout`` expires."""
+    start_loading_resources()
+    _load_finished.wait(timeout)
+    return resources_ready()
@@ -0,0 +1,78 @@
+"""Columnar table of the fields every resource listing needs."""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+COLUMNS = ("id", "type", "key", "title", "year", "authors", "organism", "mission")
+
+# Low-cardinality string columns; interning shares one object per distinct value.
+_INTERNED_COLUMNS = ("type", "year", "organism", "mission")
+
+
+def _compact(column: str, value: Any) -> Any:
+    if isinstance(value, list):
+        value = tuple(value)
+    if column in _INTERNED_COLUMNS and isinstance(value, str):
+        value = sys.intern(value)
+    return value
+
+
+class ResourceTable:
+    """One Python list per column and a resource-id-to-row map.
+
+    Heavy per-resource metadata deliberately stays out of the table; it is stored
+    separately in the snapshot and loaded on demand.
+    """
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns["id"])
+
+    def __contains__(self, resource_id: int) -> bool:
+        return resource_id in self._rows
+
+    def append(self, resource_id: int, **values: Any) -> int:
+        row = len(self)
+        for name in COLUMNS:
+            value = resource_id if name == "id" else values.get(name)
+            self._columns[name].append(_compact(name, value))
+        self._rows[resource_id] = row
+        return row
+
+    def column(self, name: str) -> List[Any]:
+        return self._columns[name]
+
+    def value(self, resource_id: int, name: str, default: Any = None) -> Any:
+        row = self._rows.get(resource_id)
+        if row is None:
+            return default
+        return self._columns[name][row]
+
+    def row(self, resource_id: int) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(resource_id)
+        if row is None:
+            return None
+        return {name: self._columns[name][row] for name in COLUMNS}
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield {name: self._columns[name][row] for name in COLUMNS}
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        return {name: list(values) for name, values in self._columns.items()}
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> "ResourceTable":
+        table = cls()
+        ids = columns.get("id", [])
+        for row, resource_id in enumerate(ids):
+            table.append(
+                int(resource_id),
+                **{name: columns[name][row] for name in COLUMNS[1:] if name in columns},
+            )
+        return table
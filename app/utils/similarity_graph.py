@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import json
-import pickle
 from functools import lru_cache
 from typing import Dict, Tuple
 
@@ -12,42 +11,39 @@ import numpy as np
 import tqdm
 from networkx.readwrite import json_graph
 
-from utils.config import RESOURCE_PATH, SIM_GRAPH
+from utils.config import SIM_GRAPH, SNAPSHOT_DIR
+from utils.resource_table import ResourceTable
+from utils.snapshot import read_snapshot
 
 TOP_K_NEIGHBOURS = 10
 
 
 def _load_resource_embeddings() -> Tuple[Dict[int, np.ndarray], Dict[int, Dict[str, object]]]:
     """Load embeddings and metadata from the exported snapshot."""
-    if not RESOURCE_PATH.exists():
+    snapshot = read_snapshot(SNAPSHOT_DIR)
+    if snapshot is None:
         raise RuntimeError(
             "Resource snapshot missing. Run the application once to generate resources and embeddings before building the graph."
         )
 
-    with RESOURCE_PATH.open("rb") as fh:
-        repository: Dict[str, Dict[str, object]] = pickle.load(fh)
-
-    snapshot = repository.get("embeddings", {})
+    matrix: np.ndarray = snapshot["embeddings"]
+    table = ResourceTable.from_columns(snapshot["metadata"].get("table", {}))
 
     embeddings: Dict[int, np.ndarray] = {}
     metadata: Dict[int, Dict[str, object]] = {}
 
-    for resource_id_str, payload in snapshot.items():
-        embedding = payload.get("embedding")
-        if not embedding:
-            continue
-        vector = np.asarray(embedding, dtype=np.float32)
+    for row, resource_id in enumerate(snapshot["row_ids"].tolist()):
+        vector = np.array(matrix[row], dtype=np.float32)
         norm = np.linalg.norm(vector)
         if not np.isfinite(norm) or norm == 0.0:
             continue
         vector /= norm
 
-        resource_id = int(resource_id_str)
         embeddings[resource_id] = vector
         metadata[resource_id] = {
-            "title": payload.get("title", "Untitled"),
-            "type": payload.get("type", "Unknown"),
-            "year": payload.get("year"),
+            "title": table.value(resource_id, "title") or "Untitled",
+            "type": table.value(resource_id, "type") or "Unknown",
+            "year": table.value(resource_id, "year"),
         }
 
     return embeddings, metadata
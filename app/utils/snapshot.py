@@ -0,0 +1,219 @@
+"""Versioned on-disk layout for the resource repository snapshot.
+
+Every write creates a new generation directory under ``generations/``; the
+``CURRENT`` file names the live one and is replaced atomically once the
+generation is complete, so readers always see the files of one generation.
+A generation holds
+
+* ``embeddings.npy`` – float32 ``(rows, dim)`` matrix, opened memory-mapped so worker
+  processes share the page cache instead of each unpickling a copy,
+* ``row_ids.npy`` – int64 resource id for every matrix row,
+* ``metadata.pkl`` – the columnar resource table and other light metadata,
+* ``heavy_metadata.bin`` – one pickled record per resource (e.g. the raw OSDR
+  metadata of an experiment), read individually on demand via byte spans,
+* ``manifest.json`` – format version, embedding model and shapes.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# v2: metadata.pkl holds the columnar resource table and per-row embedding models.
+# v3: files live in generation directories selected by ``CURRENT``.
+SNAPSHOT_FORMAT_VERSION = 3
+
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+ROW_IDS_FILE = "row_ids.npy"
+METADATA_FILE = "metadata.pkl"
+HEAVY_METADATA_FILE = "heavy_metadata.bin"
+
+HEAVY_RECORD_CACHE_SIZE = 256
+
+
+def _atomic_write(path: Path, write) -> None:
+    tmp_file = tempfile.NamedTemporaryFile(
+        "wb", delete=False, dir=path.parent, prefix=f"{path.stem}_", suffix=".tmp"
+    )
+    try:
+        with tmp_file as handle:
+            write(handle)
+        os.replace(tmp_file.name, path)
+    except Exception:  # noqa: BLE001
+        os.unlink(tmp_file.name)
+        raise
+
+
+class HeavyRecordReader:
+    """Memory-mapped view of ``heavy_metadata.bin``.
+
+    Holding the mapping keeps the original file readable even after a newer
+    snapshot replaces it on disk, so byte spans stay valid for this process.
+    """
+
+    def __init__(self, path: Path):
+        with path.open("rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            self._map = mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+    def read(self, span: Tuple[int, int]) -> Any:
+        return _read_heavy_record(self, span[0], span[1])
+
+    def _load(self, start: int, end: int) -> Any:
+        if self._map is None:
+            raise ValueError("Heavy metadata file is empty.")
+        return pickle.loads(self._map[start:end])
+
+
+@lru_cache(maxsize=HEAVY_RECORD_CACHE_SIZE)
+def _read_heavy_record(reader: HeavyRecordReader, start: int, end: int) -> Any:
+    return reader._load(start, end)
+
+
+def _write_heavy_records(handle, records: Dict[str, Any], spans: Dict[str, Tuple[int, int]]) -> None:
+    for key, record in records.items():
+        start = handle.tell()
+        pickle.dump(record, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        spans[key] = (start, handle.tell())
+
+
+def _current_generation(directory: Path) -> Optional[Path]:
+    try:
+        name = (directory / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return directory / GENERATIONS_DIR / name if name else None
+
+
+def _remove_stale_files(directory: Path, keep: Tuple[str, ...]) -> None:
+    """Drop generations other than ``keep`` and files of the pre-generation layout."""
+    for generation in (directory / GENERATIONS_DIR).iterdir():
+        if generation.name not in keep:
+            shutil.rmtree(generation, ignore_errors=True)
+    legacy_files = (
+        MANIFEST_FILE, EMBEDDINGS_FILE, ROW_IDS_FILE, METADATA_FILE, HEAVY_METADATA_FILE
+    )
+    for name in legacy_files:
+        (directory / name).unlink(missing_ok=True)
+
+
+def write_snapshot(
+    directory: Path,
+    *,
+    embeddings: np.ndarray,
+    row_ids: np.ndarray,
+    metadata: Dict[str, Any],
+    embedding_model: Optional[str],
+    heavy_records: Optional[Dict[str, Any]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Write a new snapshot generation and make it the current one.
+
+    The previous generation is kept so readers that already picked it keep
+    working; older ones are removed. The byte span of every entry in
+    ``heavy_records`` is stored in the metadata under ``heavy_spans`` so readers
+    can fetch records one at a time.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    if embeddings.shape[0] != row_ids.shape[0]:
+        raise ValueError("Embedding rows and row ids must have the same length.")
+
+    generations = directory / GENERATIONS_DIR
+    generations.mkdir(parents=True, exist_ok=True)
+    generation = Path(tempfile.mkdtemp(dir=generations, prefix="gen_"))
+    generation.chmod(0o755)
+    try:
+        spans: Dict[str, Tuple[int, int]] = {}
+        with (generation / HEAVY_METADATA_FILE).open("wb") as fh:
+            _write_heavy_records(fh, heavy_records or {}, spans)
+        metadata = {**metadata, "heavy_spans": spans}
+
+        np.save(generation / EMBEDDINGS_FILE, embeddings)
+        np.save(generation / ROW_IDS_FILE, row_ids)
+        with (generation / METADATA_FILE).open("wb") as fh:
+            pickle.dump(metadata, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "embedding_model": embedding_model,
+            "rows": int(embeddings.shape[0]),
+            "dimension": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+            **(extra or {}),
+        }
+        (generation / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    except BaseException:
+        shutil.rmtree(generation, ignore_errors=True)
+        raise
+
+    previous = _current_generation(directory)
+    _atomic_write(directory / CURRENT_FILE, lambda fh: fh.write(generation.name.encode("utf-8")))
+    keep = (generation.name,) + ((previous.name,) if previous is not None else ())
+    _remove_stale_files(directory, keep)
+
+
+def _read_manifest_file(generation: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with (generation / MANIFEST_FILE).open("r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def read_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    generation = _current_generation(directory)
+    return _read_manifest_file(generation) if generation is not None else None
+
+
+def read_snapshot(directory: Path, *, mmap: bool = True) -> Optional[Dict[str, Any]]:
+    """Return ``manifest``, ``embeddings``, ``row_ids``, ``metadata`` and ``heavy`` or ``None``.
+
+    All files come from the generation ``CURRENT`` named when the read started.
+    ``heavy`` is a :class:`HeavyRecordReader`, or ``None`` for snapshots written
+    before heavy records were split out.
+    """
+    generation = _current_generation(directory)
+    if generation is None:
+        return None
+    manifest = _read_manifest_file(generation)
+    if manifest is None:
+        return None
+    try:
+        embeddings = np.load(generation / EMBEDDINGS_FILE, mmap_mode="r" if mmap else None)
+        row_ids = np.load(generation / ROW_IDS_FILE)
+        with (generation / METADATA_FILE).open("rb") as fh:
+            metadata = pickle.load(fh)
+        heavy_path = generation / HEAVY_METADATA_FILE
+        heavy = HeavyRecordReader(heavy_path) if heavy_path.exists() else None
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+
+    rows = manifest.get("rows")
+    if embeddings.dtype != np.float32 or embeddings.shape[0] != rows or row_ids.shape[0] != rows:
+        return None
+    if not isinstance(metadata, dict):
+        return None
+    return {
+        "manifest": manifest,
+        "embeddings": embeddings,
+        "row_ids": row_ids,
+        "metadata": metadata,
+        "heavy": heavy,
+    }
@@ -1,6 +1,9 @@
 from pathlib import Path
 import streamlit as st
 from utils.config import LOGO_PATH
+import utils.resource_manager as R
+
+RESOURCE_POLL_SECONDS = 1.0
 
 
 def render_app_sidebar() -> None:
@@ -12,4 +15,35 @@ def render_app_sidebar() -> None:
     )
 
 
-__all__ = ["render_app_sidebar"]
+def require_resources() -> bool:
+    """Start loading resources and report whether they are ready.
+
+    While they load, a fragment polls the status and reruns the app once loading
+    ends, so the rest of the page renders without blocking on a sleep.
+    """
+    R.start_loading_resources()
+    load_status = R.get_load_status()
+    if load_status["state"] == "ready":
+        return True
+    if load_status["state"] == "failed":
+        st.error(f"Resources could not be loaded: {load_status['error']}")
+        st.button(
+            "Retry loading",
+            key="retry-resource-load",
+            on_click=R.start_loading_resources,
+            kwargs={"retry": True},
+        )
+        return False
+    _render_load_progress()
+    return False
+
+
+@st.fragment(run_every=RESOURCE_POLL_SECONDS)
+def _render_load_progress() -> None:
+    load_status = R.get_load_status()
+    if load_status["state"] in ("ready", "failed"):
+        st.rerun()
+    st.info(f"⏳ {load_status['message'] or 'Loading resources…'}")
+
+
+__all__ = ["render_app_sidebar", "require_resources"]